@@ -2,46 +2,75 @@
 FIKS Tools v1.2
 
 '''
-print(__file__)
-
-
 import sys
 import os
 import subprocess
-import json
-import re
+import logging
+import shutil
+import time
+
+# Målepunkt for --profile-startup (tid til hovedvinduet er tegnet)
+_STARTUP_T0 = time.perf_counter()
+
+if __name__ == "__main__":
+    # Arbeidsprosesser (i den frosne .exe-en) og batch-kjøringen trenger ikke
+    # GUI-et, så de tas hånd om før tkinter, PIL og resten importeres
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from fiks_core.batch import run_batch
+        from utils import tracing
+        tracing.enable_from_env()
+        sys.exit(run_batch(sys.argv[1:]))
+
+# Gjenkjenning, ekstrahering og eksport ligger i fiks_core (uten GUI)
+from fiks_core import (
+    AdvancedShippingNoteExtractor, InvoiceToGoldExtractor, ParsedDocument, ProgressReader,
+    export_to_excel_flexible, format_nok, result_for_export,
+)
+from utils.lazy_imports import LazyModule, prewarm
 from utils.export_thread   import threaded_export
-from utils.export_helpers import generate_gtin_with_progress
+from utils.barcode_cache import cached_barcode, evict
+from utils.update_check import fetch_latest_release, newer_installer, published_sha256
+from utils.downloader import DownloadError, download_file
+from utils.paths import user_cache_dir
+from utils.audio import AudioPlayer
+from utils.settings_store import SettingsStore
+from utils.ui_events import UIEventQueue
+from utils.jobs import JobManager, PRIORITY_HIGH, DEFAULT_WORKERS
+from utils.jobs_panel import JobsPanel
+from utils.virtual_tree import VirtualTable
+from utils import tracing
+from utils.tracing import span
+from utils.log_setup import setup_logging
 
 import webbrowser
 import tkinter as tk
 import tkinter.ttk as ttk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageFont
-from lxml import etree
-import openpyxl
-import barcode
-from barcode.writer import ImageWriter
-import pygame
+from PIL import Image, ImageTk
 import tkinter.font as tkfont
-import xml.etree.ElementTree as ET
-from lxml import etree
-import random
-import pandas as pd
-from utils.export_thread   import threaded_export
-from utils.export_helpers import generate_gtin_with_progress
 
-import platform
+# Tunge moduler lastes først når verktøyet som trenger dem brukes
+# (eller varmes opp i bakgrunnen etter at vinduet er tegnet, se PREWARM_MODULES)
+pd = LazyModule("pandas")
 
-import requests
-import subprocess
-import sys
-import os
+# Loggere per område; nivåene kan settes per navn i config.json (se utils/log_setup.py)
+log = logging.getLogger("fiks")
+extract_log = logging.getLogger("fiks.extract")
+update_log = logging.getLogger("fiks.update")
+log.debug("Laster %s", __file__)
 
+PREWARM_MODULES = ("lxml.etree", "pandas", "openpyxl", "barcode")
+PREWARM_DELAY_MS = 1000
+# Mål for kaldstart (ms til hovedvinduet er tegnet), sjekkes av --profile-startup
+STARTUP_BUDGET_MS = 1500
 
 
 REPO = "torsteinvalberg/FIKS_Tools_Installer"
 CURRENT_VERSION = "1.2"
+# Hvor ofte GitHub faktisk spørres; ellers brukes lagret svar (config.json: update_check_hours)
+UPDATE_CHECK_INTERVAL_HOURS = 12
 
 def center_window(win):
     # tving fram beregning av alle widgets og størrelser
@@ -57,31 +86,38 @@ def center_window(win):
     y = (sh - h) // 2
     win.geometry(f"{w}x{h}+{x}+{y}")
     
-def check_for_update():
-    print("Sjekker etter oppdatering...")
-    api_url = f"https://api.github.com/repos/{REPO}/releases/latest"
-
+def check_for_update(interval_hours=UPDATE_CHECK_INTERVAL_HOURS):
+    # Kjøres i en bakgrunnstråd etter at GUI-et er oppe.
+    # Returnerer (versjon, asset) når en nyere installer finnes, ellers None.
+    update_log.info("Sjekker etter oppdatering...")
     try:
-        response = requests.get(api_url, timeout=5)
-        data = response.json()
-        latest_version = data["tag_name"].lstrip("v")
-
-        if latest_version > CURRENT_VERSION:
-            print(f"Ny versjon tilgjengelig: {latest_version}")
-            for asset in data["assets"]:
-                if asset["name"].endswith(".exe"):
-                    url = asset["browser_download_url"]
-                    filename = "installer_update.exe"
-                    with open(filename, "wb") as f:
-                        f.write(requests.get(url).content)
-                    print("Laster ned og starter oppdatering...")
-                    subprocess.Popen([filename], shell=True)
-                    sys.exit()
-        else:
-            print("Appen er oppdatert")
-
+        release = fetch_latest_release(REPO, interval_hours=interval_hours)
     except Exception as e:
-        print(f"Oppdateringssjekk feilet: {e}")
+        update_log.warning("Oppdateringssjekk feilet: %s", e)
+        return None
+
+    update = newer_installer(release, CURRENT_VERSION)
+    if update:
+        update_log.info("Ny versjon tilgjengelig: %s", update[0])
+    else:
+        update_log.info("Appen er oppdatert")
+    return update
+
+
+def install_update(asset, progress_func=None):
+    # Strømmer installeren til cache-mappen (gjenopptas etter brudd) og
+    # starter den bare når SHA-256 stemmer med den publiserte. .part-filen
+    # ligger i en mappe per digest, så en ny utgivelse aldri skjøtes på en
+    # gammel nedlasting.
+    expected = published_sha256(asset)
+    if not expected:
+        raise DownloadError(f"Ingen publisert SHA-256 for {asset['name']}; installeren startes ikke")
+    path = download_file(
+        asset["browser_download_url"], user_cache_dir("updates", expected[:16].lower(), asset["name"]),
+        expected_sha256=expected, progress_func=progress_func,
+    )
+    update_log.info("Starter oppdatering %s", path)
+    subprocess.Popen([path], shell=True)
 
 
 def show_loading_popup_with_progress(parent, total, message="Laster og genererer strekkoder..."):
@@ -130,92 +166,6 @@ def show_loading_popup_with_progress(parent, total, message="Laster og genererer
 
 
 
-def format_nok(value):
-    try:
-        f = float(value)
-        return f"kr {f:,.2f}".replace(",", " ").replace(".", ",")
-    except:
-        return value
-    
-def clean_gtin(gtin):
-    s = re.sub(r'\D', '', str(gtin))  # Keep only digits
-    if len(s) > 13 and s[0] in ("0", "1", "2", "3"):
-        s = s[1:]
-    return s
-
-def export_to_excel_flexible(file, result, with_barcodes=False, parent_window=None):
-    import os
-    import platform
-    import pandas as pd
-    from openpyxl import Workbook, load_workbook
-    from openpyxl.utils import get_column_letter
-    from openpyxl.drawing.image import Image
-
-    if "Products" not in result:
-        messagebox.showerror("Feil", "Ingen produkter funnet for eksport.")
-        return
-
-    df = pd.DataFrame(result["Products"])
-
-    if with_barcodes:
-        if "GTIN" in df.columns:
-            df["GTIN"] = df["GTIN"].astype(str).str.strip()
-        df = generate_gtin_with_progress(df, parent_window)
-
-
-    df.to_excel(file, index=False, startrow=3)
-
-    wb = load_workbook(file)
-    ws = wb.active
-
-    if "OrderNumber" in result:
-        ws["A1"] = f"OrderNumber: {result['OrderNumber']}"
-        ws["A2"] = f"OrderDate: {result['OrderDate']}"
-    elif "InvoiceNumber" in result:
-        ws["A1"] = f"InvoiceNumber: {result['InvoiceNumber']}"
-        ws["A2"] = f"InvoiceDate: {result['InvoiceDate']}"
-        ws["A3"] = f"Total: {result['Summary']['TotalAmount']}  |  MVA: {result['Summary']['VatAmount']} {result['Summary']['Currency']}"
-
-    # Legg til strekkodebilder hvis aktuelt
-    if with_barcodes:
-        header_row = ws[4]
-        col_map = {cell.value: cell.column for cell in header_row if cell.value}
-        barcode_col = col_map.get("StrekkodeFil")
-
-        if barcode_col:
-            for idx, row in df.iterrows():
-                img_path = row.get("StrekkodeFil")
-                if img_path and os.path.exists(img_path):
-                    try:
-                        img = Image(img_path)
-                        img.height = 100
-                        img.width = 300
-                        cell = ws.cell(row=5 + idx, column=barcode_col)
-                        ws.add_image(img, cell.coordinate)
-                        ws.row_dimensions[5 + idx].height = 110
-                    except Exception as e:
-                        print(f"[FEIL] Kunne ikke legge inn strekkode: {e}")
-
-    # Juster kolonnebredde
-    for col in range(1, ws.max_column + 1):
-        max_length = 0
-        col_letter = get_column_letter(col)
-        for row in range(1, ws.max_row + 1):
-            val = ws.cell(row=row, column=col).value
-            if val:
-                max_length = max(max_length, len(str(val)))
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    wb.save(file)
-
-    if platform.system() == "Windows":
-        os.startfile(file)
-    elif platform.system() == "Darwin":
-        os.system(f"open \"{file}\"")
-    else:
-        os.system(f"xdg-open \"{file}\"")
-
-
 # Paths
 BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
 CONFIG_PATH = os.path.join(BASE_DIR, 'config.json')
@@ -261,7 +211,7 @@ current_lang = {
     'help': 'Veiledning'
 }
 
-# Music tracks
+# Music tracks (en .ogg/.mp3 med samme navn brukes foran .wav, se utils/audio.py)
 BGM_TRACKS = {
     'REMAchiptune #1': os.path.join(BASE_DIR,'assets','ChipREMA1.wav'),
     'REMAchiptune #2': os.path.join(BASE_DIR,'assets','ChipREMA2.wav'),
@@ -269,6 +219,7 @@ BGM_TRACKS = {
     'Fiksarna #4': os.path.join(BASE_DIR,'assets','Fiksarna.wav'),
     'Garasje #4': os.path.join(BASE_DIR,'assets','Garasje.wav')
 }
+CONFIG_DEFAULTS = {'track': next(iter(BGM_TRACKS)), 'volume': 0.5, 'muted': False, 'log_level': 'INFO'}
 
 # Helper: add logo image to a parent widget
 def add_logo(parent):
@@ -279,7 +230,7 @@ def add_logo(parent):
         lbl.image = photo
         lbl.pack(side='left', padx=10)
     except Exception as e:
-        print(f"[ERROR] {e}")
+        log.error("Kunne ikke laste logo: %s", e)
 
 
 # Themed header containing logo + title
@@ -291,124 +242,6 @@ class ThemedHeader(ttk.Frame):
         lbl.pack(side='left')
         self.pack(fill='x', pady=(0,10))
 
-# Sanitize XML input
-def sanitize_input(txt: str) -> str:
-    txt = re.sub(r'(?s)<(style|script)[^>]*>.*?</\1>', '', txt)
-    txt = re.sub(r'<!--.*?-->', '', txt)
-    txt = re.sub(r'<!DOCTYPE[^>]*>', '', txt)
-    txt = re.sub(r'<\?xml[^>]*\?>', '', txt)
-    txt = txt.replace('&nbsp;', ' ').replace('&amp;', '&')
-    txt = re.sub(r'[^\x00-\x7F]+', '', txt)
-    txt = re.sub(r'\n[ 	]*\n+', '\n', txt)
-    return txt.strip()
-
-# Extract unique XML tags
-def get_unique_tags(xml_text: str) -> list[str]:
-    parser = etree.XMLParser(recover=True)
-    root = etree.fromstring(xml_text.encode(), parser=parser)
-    tags = set(re.sub(r'\{.*?\}', '', el.tag).split(':')[-1] for el in root.iter())
-    return sorted(tags)
-
-# Clean-extract XML block
-def extract_clean_xml_block(raw_text: str) -> str:
-    
-    xml_pos = raw_text.find('<?xml')
-    if xml_pos != -1:
-        raw_text = raw_text[xml_pos:]
-
-    start = raw_text.find('<')
-    end = raw_text.rfind('>') + 1
-    if end <= start:
-        raise ValueError('Fant ikke gyldig XML-innhold.')
-
-    cleaned = raw_text[start:end]
-
-    cleaned = re.sub(r'^[\'"]?(<\?xml[^>]*\?>)?', r'\1', cleaned.strip())
-    cleaned = cleaned.strip('\'"')  
-
-    if cleaned.count('<') > 1 and not cleaned.lower().startswith('<root'):
-        cleaned = f"<Root>{cleaned}</Root>"
-
-    return cleaned
-
-
-def detect_extractor(xml_text: str):
-    for name, entry in EXTRACTOR_REGISTRY.items():
-        try:
-            if entry['match'](xml_text):
-                print(f"[INFO] Matcher extractor: {name}")
-                return entry['class']()
-        except Exception as e:
-            print(f"[ERROR] Feil ved matching av extractor {name}: {e}")
-    raise ValueError("Ukjent XML-type. Kan ikke velge riktig extractor.")
-
-def register_extractor(name, match_fn, extractor_class):
-    print(f"[REGISTER] Extractor: {name}")
-    EXTRACTOR_REGISTRY[name] = {
-        'match': match_fn,
-        'class': extractor_class
-    }
-
-
-# SmartXMLExtractor
-class SmartXMLExtractor:
-    def __init__(self, parent_tag, child_tags, deep=True):
-        self.parent_tag = parent_tag.lower()
-        self.child_tags = [t.lower() for t in child_tags]
-        self.deep = deep
-    def strip_ns(self, tag:str): return re.sub(r'\{.*?\}','', tag).split(':')[-1].lower()
-    def extract_from_element(self, elem):
-        res, code_map, last = {}, {}, ''
-        for sub in (elem.iter() if self.deep else elem):
-            t = self.strip_ns(sub.tag)
-            if t in self.child_tags and t.upper() not in res:
-                res[t.upper()] = (sub.text or '').strip()
-            if t=='code': last=(sub.text or '').strip(); continue
-            if t=='text' and last:
-                code_map[last.upper()] = (sub.text or '').strip(); last=''
-        for k in self.child_tags:
-            ku=k.upper()
-            if ku in code_map and ku not in res: res[ku]=code_map[ku]
-        return res
-    def extract(self, xml_text: str) -> list[dict]:
-        parser=etree.XMLParser(recover=True)
-        root=etree.fromstring(xml_text.encode(),parser=parser)
-        elems=[e for e in root.iter() if self.strip_ns(e.tag)==self.parent_tag]
-        if not elems: raise ValueError(f"Ingen '{self.parent_tag}'-blokker funnet.")
-        return [self.extract_from_element(e) for e in elems]
-
-class OpenPurchaseOrderToAzureExtractor(SmartXMLExtractor):
-    def __init__(self):
-        super().__init__(
-            parent_tag="BaseItemDetails",
-            child_tags=[
-                "Description",
-                "SuppliersProductId",
-                "BuyersProductId",
-                "GTIN",
-                "GTIN-FPAK",
-                "EPD",
-                "QuantityOrdered"
-            ],
-            deep=True
-        )
-
-# Extractor Registry
-EXTRACTOR_REGISTRY = {}
-
-def register_extractor(name, match_fn, extractor_class):
-    EXTRACTOR_REGISTRY[name] = {
-        'match': match_fn,
-        'class': extractor_class
-    }
-
-def detect_extractor(xml_text: str):
-    for name, entry in EXTRACTOR_REGISTRY.items():
-        if entry['match'](xml_text):
-            return entry['class']()
-    raise ValueError("Ukjent XML-type. Kan ikke velge riktig extractor.")
-
-
 # Main Application
 class FIKSToolsApp:
     def __init__(self, root):
@@ -438,13 +271,76 @@ class FIKSToolsApp:
         style.configure('Header.TFrame', background=HEADER_BG, padding=HEADER_PADDING)
         style.configure('HeaderTitle.TLabel', background=HEADER_BG, font=TITLE_FONT)
 
+        # Arbeidstråder melder fremdrift/resultater til Tk via denne køen
+        self.events = UIEventQueue(self.root)
+
         # Load config & initialize audio
         self.load_config()
-        self.setup_audio()
+        setup_logging(self.config.get('log_level'), self.config.get('log_levels'))
+        # Eksport og strekkoder køes i en begrenset pool og vises i ett jobbpanel
+        self.jobs = JobManager(self.events, max_workers=self.config.get('job_workers', DEFAULT_WORKERS))
+        self.jobs_panel = JobsPanel(self.root, self.jobs, bg=BACKGROUND_COLOR)
+        self.jobs.on_change = self.jobs_panel.on_change
+        self.audio = AudioPlayer(BGM_TRACKS, self.current_track, self.bgm_volume, muted=not self.bgm_on)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_main_menu()
         self.root.geometry('600x500')
 
+        # Lyd og tunge moduler lastes etter at hovedvinduet er tegnet
+        self.root.after(PREWARM_DELAY_MS, self.after_startup)
+
+    def on_close(self):
+        # Lydtråden bes avslutte før vinduet lukkes
+        self.audio.stop()
+        self.root.destroy()
+
+    def after_startup(self):
+        prewarm(*PREWARM_MODULES)
+        self.setup_audio()
+        self.start_update_check()
+
+    def start_update_check(self):
+        # Nettverkskallet går i bakgrunnen; svaret kommer via hendelseskøen
+        interval = self.config.get('update_check_hours', UPDATE_CHECK_INTERVAL_HOURS)
+        self.events.run(
+            lambda chan: check_for_update(interval),
+            on_result=lambda update: update and self.offer_update(*update),
+            name="update-check",
+        )
+
+    def offer_update(self, version, asset):
+        if not messagebox.askyesno(
+            "Oppdatering",
+            f"{APP_NAME} {version} er tilgjengelig.\nVil du laste ned og installere nå?"
+        ):
+            return
+
+        # Nedlastingen går i bakgrunnen; Tk-tråden oppdaterer fremdriften
+        popup, bar, percent_label = show_loading_popup_with_progress(
+            self.root, 100, f"Laster ned {APP_NAME} {version}...")
+
+        def on_progress(received, total):
+            if total:
+                bar["value"] = received * 100 / total
+                percent_label.config(text=f"{received * 100 // total}%  ({received // 1024 ** 2} / {total // 1024 ** 2} MB)")
+            else:
+                percent_label.config(text=f"{received // 1024 ** 2} MB")
+
+        def on_error(e):
+            popup.destroy()
+            messagebox.showerror("Oppdatering", f"Kunne ikke laste ned oppdateringen: {e}")
+
+        def on_done(_):
+            self.on_close()
+            sys.exit()
+
+        self.events.run(
+            lambda chan: install_update(asset, progress_func=chan.progress),
+            on_progress=on_progress, on_result=on_done, on_error=on_error,
+            name="update-download",
+        )
+
     def create_styled_button(self, parent, **kwargs):
         btn = tk.Button(
             parent,
@@ -464,33 +360,23 @@ class FIKSToolsApp:
 
     
     def load_config(self):
-        if os.path.exists(CONFIG_PATH): 
-            with open(CONFIG_PATH) as f:
-                self.config = json.load(f)
-        else:
-            self.config = {'track': next(iter(BGM_TRACKS)), 'volume': 0.5, 'muted': False}
+        # self.config er en SettingsStore: endringer skrives samlet og atomisk
+        # i bakgrunnen, og ventende endringer lagres når appen avslutter
+        self.config = SettingsStore(CONFIG_PATH, defaults=CONFIG_DEFAULTS)
         self.current_track = self.config['track']
         self.bgm_volume   = self.config['volume']
         self.bgm_on       = not self.config['muted']
 
     def save_config(self):
-        with open(CONFIG_PATH, 'w') as f:
-            json.dump({
-                'track': self.current_track,
-                'volume': self.bgm_volume,
-                'muted': not self.bgm_on
-            }, f)
+        self.config.update(
+            track=self.current_track,
+            volume=self.bgm_volume,
+            muted=not self.bgm_on,
+        )
 
     def setup_audio(self):
-        pygame.mixer.init()
-        try:
-            pygame.mixer.music.load(BGM_TRACKS[self.current_track])
-            pygame.mixer.music.set_volume(self.bgm_volume)
-            pygame.mixer.music.play(-1)
-            if not self.bgm_on:
-                pygame.mixer.music.pause()
-        except Exception as e:
-            print(f"[ERROR] {e}")
+        # Mixeren startes først når lyden er på (her, eller ved første unmute)
+        self.audio.play(self.current_track)
 
 
     def add_music_controls(self):
@@ -504,7 +390,7 @@ class FIKSToolsApp:
         # 1) Volume slider
         def change_volume(val):
             self.bgm_volume = float(val)
-            pygame.mixer.music.set_volume(self.bgm_volume)
+            self.audio.set_volume(self.bgm_volume)
             self.save_config()
         vol = tk.Scale(
             controls, from_=0, to=1,
@@ -523,24 +409,10 @@ class FIKSToolsApp:
         # Track dropdown
         track_var = tk.StringVar(value=self.current_track)
 
-        import threading
-
         def change_track(evt=None):
-            sel = track_var.get()
-            
-            def _load_track(selected_track):
-                self.current_track = selected_track
-                try:
-                    pygame.mixer.music.load(BGM_TRACKS[selected_track])
-                    pygame.mixer.music.play(-1)
-                    pygame.mixer.music.set_volume(self.bgm_volume)
-                except Exception as e:
-                    messagebox.showerror('Musikkfeil', f'Kunne ikke laste {selected_track}: {e}')
-                if not self.bgm_on:
-                    pygame.mixer.music.pause()
-                self.save_config()
-
-            threading.Thread(target=lambda: _load_track(sel)).start()
+            self.current_track = track_var.get()
+            self.audio.play(self.current_track)
+            self.save_config()
 
         cb = ttk.Combobox(
             btn_frame,
@@ -556,12 +428,8 @@ class FIKSToolsApp:
         # Mute/unmute button
         def toggle_mute():
             self.bgm_on = not self.bgm_on
-            if self.bgm_on:
-                pygame.mixer.music.unpause()
-                mute_btn.config(text='🔊')
-            else:
-                pygame.mixer.music.pause()
-                mute_btn.config(text='🔇')
+            self.audio.set_muted(not self.bgm_on)
+            mute_btn.config(text='🔊' if self.bgm_on else '🔇')
             self.save_config()
         mute_btn = self.create_styled_button(
         btn_frame,
@@ -578,7 +446,11 @@ class FIKSToolsApp:
         hm = tk.Menu(mb, tearoff=0)
         hm.add_command(label=current_lang['about'], command=self.open_about)
         hm.add_command(label=current_lang['help'],  command=self.open_help)
+        hm.add_separator()
+        self.trace_var = tk.BooleanVar(value=tracing.enabled())
+        hm.add_checkbutton(label='Tidsmåling (trace)', variable=self.trace_var, command=self.toggle_tracing)
         mb.add_cascade(label='Hjelp', menu=hm)
+        mb.add_command(label='Jobber', command=self.jobs_panel.show)
         self.root.config(menu=mb)
 
         # Header + title
@@ -621,6 +493,18 @@ class FIKSToolsApp:
 
 
 
+    def toggle_tracing(self):
+        # På: steg-tider samles fra nå. Av: trace skrives og oppsummering vises.
+        if self.trace_var.get():
+            tracing.enable()
+            return
+        recorder = tracing.disable()
+        if not recorder or not recorder.events:
+            messagebox.showinfo("Tidsmåling", "Ingen steg ble målt.")
+            return
+        path = tracing.report(recorder, "chrome")
+        messagebox.showinfo("Tidsmåling", f"{recorder.summary()}\n\nTrace: {path}")
+
     def open_about(self):
         win = tk.Toplevel(self.root)
         win.title(current_lang['about'])
@@ -638,7 +522,7 @@ class FIKSToolsApp:
             logo_lbl.image = photo
             logo_lbl.pack(side='left', padx=(0, 10))
         except Exception as e:
-            print(f"[ERROR] Kunne ikke laste logo: {e}")
+            log.error("Kunne ikke laste logo: %s", e)
 
         text_lbl = tk.Label(
             header_frame,
@@ -707,7 +591,7 @@ class FIKSToolsApp:
             heart_lbl.image = heart_photo
             heart_lbl.pack(side='left', padx=(5, 0))
         except Exception as e:
-            print(f"[ERROR] Klarte ikke laste blått hjerte: {e}")
+            log.error("Klarte ikke laste blått hjerte: %s", e)
 
 
     def open_help(self):
@@ -760,22 +644,22 @@ Smart Extractor
         frame = tk.Frame(gen, bg=BACKGROUND_COLOR); frame.pack(pady=10)
         tk.Label(frame, text=current_lang['export_label'], bg=BACKGROUND_COLOR, font=BUTTON_FONT).pack(side='left', padx=5)
         ttk.Combobox(frame, textvariable=export_var, values=['HTML','PDF'], width=10).pack(side='left')
-        def on_generate():
-            raw = text_input.get('1.0',tk.END).strip()
-            codes = [c.strip() for c in raw.replace(',', '\n').splitlines() if c.strip()]
-            if not codes: messagebox.showwarning(current_lang['warning_title'],current_lang['warning_msg']); return
-            outd = filedialog.askdirectory(title=current_lang['output_folder_title']);
-            if not outd: return
+        def build_barcodes(job, codes, outd, export_kind):
+            # Kjøres i bakgrunnen; fremdrift meldes som (ferdige, totalt)
+            started = time.time()
             errs, gen_list = [], []
             opts = {'font_path': FONT_REGULAR_PATH}
-            for c in codes:
+            for i, c in enumerate(codes, start=1):
+                job.progress(i, len(codes))
                 if len(c)!=13 or not c.isdigit(): errs.append(f"Invalid GTIN '{c}'"); continue
                 try:
-                    e = barcode.get('ean13',c,writer=ImageWriter()); e.writer.set_options(opts)
-                    p = e.save(os.path.join(outd,c)); gen_list.append((c,p))
+                    # Hent fra strekkode-cachen og kopier til valgt mappe
+                    p = os.path.join(outd, c + '.png')
+                    shutil.copyfile(cached_barcode(c, 'ean13', writer_options=opts), p); gen_list.append((c,p))
                 except Exception as ex: errs.append(f"Error '{c}': {ex}")
+            evict(keep_since=started)
             export_path = ''
-            if export_var.get()=='HTML' and gen_list:
+            if export_kind=='HTML' and gen_list:
                 hp = os.path.join(outd,'barcodes.html')
                 with open(hp,'w',encoding='utf-8') as f:
                     f.write(f"<html><body><h1>{current_lang['html_title']}</h1>\n")
@@ -783,8 +667,8 @@ Smart Extractor
                         rp = os.path.relpath(p,outd)
                         f.write(f"<p>{c}<br><img src='{rp}' height='100'></p>\n")
                     f.write('</body></html>')
-                export_path = hp; webbrowser.open(f"file://{hp}")
-            elif export_var.get()=='PDF' and gen_list:
+                export_path = hp
+            elif export_kind=='PDF' and gen_list:
                 from reportlab.lib.pagesizes import A4
                 from reportlab.platypus import SimpleDocTemplate,Paragraph,Spacer,Image as RLImage
                 from reportlab.lib.styles import getSampleStyleSheet
@@ -795,355 +679,308 @@ Smart Extractor
                     try: elems.append(RLImage(p,width=250,height=80))
                     except: elems.append(Paragraph('(Image load failed)',styles['Normal']))
                     elems.append(Spacer(1,10))
-                doc.build(elems); export_path=pdf; webbrowser.open(f"file://{pdf}")
-            if errs: messagebox.showerror(current_lang['warning_title'],'\n'.join(errs))
-            else:
-                msg = f"{current_lang['html_title']} gen.:\n{outd}" + (f"\nSaved list: {export_path}" if export_path else '')
-                messagebox.showinfo(current_lang['generate_btn'],msg)
-        self.create_styled_button(gen, text=current_lang['generate_btn'], command=on_generate).pack(pady=10)
+                doc.build(elems); export_path=pdf
+            return errs, export_path
 
-    def perform_extraction(self):
-        try:
-            raw_input = self.xml_text.get('1.0', tk.END)
-            print("[DEBUG] Rå-innlimt XML:", raw_input[:300], flush=True)
+        def on_generate():
+            raw = text_input.get('1.0',tk.END).strip()
+            codes = [c.strip() for c in raw.replace(',', '\n').splitlines() if c.strip()]
+            if not codes: messagebox.showwarning(current_lang['warning_title'],current_lang['warning_msg']); return
+            outd = filedialog.askdirectory(title=current_lang['output_folder_title']);
+            if not outd: return
 
-            raw = extract_clean_xml_block(raw_input)
-            print("[DEBUG] Etter extract_clean_xml_block:", raw[:300], flush=True)
+            def on_done(res):
+                errs, export_path = res
+                if export_path: webbrowser.open(f"file://{export_path}")
+                if errs: messagebox.showerror(current_lang['warning_title'],'\n'.join(errs))
+                else:
+                    msg = f"{current_lang['html_title']} gen.:\n{outd}" + (f"\nSaved list: {export_path}" if export_path else '')
+                    messagebox.showinfo(current_lang['generate_btn'],msg)
 
-            self.extractor_instance = detect_extractor(raw)
-            print(f"[DEBUG] Valgt extractor: {type(self.extractor_instance).__name__}", flush=True)
+            def on_error(e):
+                messagebox.showerror(current_lang['warning_title'], str(e))
 
-            result = self.extractor_instance.extract(raw)
-            print(f"[DEBUG] Antall produkter funnet: {len(result.get('Products', []))}", flush=True)
-        except Exception as e:
-            messagebox.showerror("Feil", str(e))
-            return
+            # Kort, interaktiv jobb: går foran eksporter som står i kø
+            self.jobs.submit(f"Strekkoder: {len(codes)} GTIN", build_barcodes, codes, outd, export_var.get(),
+                             priority=PRIORITY_HIGH, on_result=on_done, on_error=on_error)
+        self.create_styled_button(gen, text=current_lang['generate_btn'], command=on_generate).pack(pady=10)
 
+    def perform_extraction(self):
         try:
-            raw = extract_clean_xml_block(self.xml_text.get('1.0', tk.END))
-            self.extractor_instance = detect_extractor(raw)
-            result = self.extractor_instance.extract(raw)
+            # Gjenkjenning leser bare starten av dokumentet; selve ekstraheringen
+            # går som jobb og strømmer radene inn i forhåndsvisningen
+            self.document = ParsedDocument.from_text(self.xml_text.get('1.0', tk.END))
+            self.extractor_instance = self.document.extractor
         except Exception as e:
             messagebox.showerror("Feil", str(e))
             return
+        extract_log.info("Valgt extractor: %s", type(self.extractor_instance).__name__)
 
-        # Visning for AdvancedShippingNote
         if isinstance(self.extractor_instance, AdvancedShippingNoteExtractor):
-            preview = tk.Toplevel(self.extractor)
-            preview.title("Forhåndsvisning – ASN")
-            preview.configure(bg=BACKGROUND_COLOR)
-
-            tk.Label(preview, text=f"DeliveryNote: {result['DeliveryNoteNumber']}", font=self.custom_font_bold, bg=BACKGROUND_COLOR).pack()
-
-            tree = ttk.Treeview(preview)
-            tree["columns"] = ("Varenavn", "GTIN", "EPD", "Quantity")
-            for col in tree["columns"]:
-                tree.heading(col, text=col)
-                width = 250 if col == "Varenavn" else 130
-                tree.column(col, anchor="w", width=width)
-
-            tree.pack(fill='both', expand=True)
+            self.asn_preview(self.extractor_instance)
+        elif isinstance(self.extractor_instance, InvoiceToGoldExtractor):
+            self.invoice_preview(self.extractor_instance)
+        else:
+            self.po_preview(self.extractor_instance)
+
+    def stream_extraction(self, preview, extractor, on_rows, on_done):
+        # Kjører extractor.iter_products som jobb på self.document.
+        # on_rows(header, bolk) og on_done(result) kalles i Tk-tråden.
+        # Lukkes forhåndsvisningen, avbrytes jobben.
+        status = tk.Frame(preview, bg=BACKGROUND_COLOR)
+        status.pack(fill='x', padx=10, pady=(0, 10))
+        bar = ttk.Progressbar(status, mode='determinate', length=250, maximum=100)
+        bar.pack(side='left')
+        label = tk.Label(status, text="Leser XML... 0%", font=self.custom_font_regular, bg=BACKGROUND_COLOR)
+        label.pack(side='left', padx=10)
+        products = []
 
-            if not result["Packages"]:
-                messagebox.showinfo("Ingen data", "Ingen pakksedler eller varer ble funnet.")
+        def run(job, raw):
+            header = {}
+            with span("extract_stream", extractor=type(extractor).__name__):
+                for batch in iter_product_batches(extractor, ProgressReader(raw, job.progress), header):
+                    job.data((dict(header), batch))
+            return header
+
+        def on_progress(done, total):
+            if preview.winfo_exists():
+                pct = done * 100 // total if total else 100
+                bar["value"] = pct
+                label.config(text=f"Leser XML... {pct}%  ({len(products)} rader)")
+
+        def on_data(payload):
+            header, batch = payload
+            products.extend(batch)
+            if preview.winfo_exists():
+                with span("preview_fill", rows=len(batch)):
+                    on_rows(header, batch)
+
+        def on_result(header):
+            if not preview.winfo_exists():
                 return
+            bar.destroy()
+            cancel_btn.destroy()
+            label.config(text=f"{len(products)} rader")
+            on_done(extractor.result_from(header, products))
+
+        def on_error(e):
+            if preview.winfo_exists():
+                label.config(text="Feilet")
+            messagebox.showerror("Feil", str(e))
 
-            for ident, rows in result["Packages"].items():
-                if not rows:
-                    continue
-
-                buyers_order_number = rows[0].get("BuyersOrderNumber", "")
-                parent = tree.insert("", "end", text=ident, open=False)
-
-                if buyers_order_number:
-                    tree.insert(parent, "end", text=f"Ordrenummer: {buyers_order_number}")
-
-                for row in rows:
-                    qty = row.get("Quantity", "").replace(" PCE", "").strip()
-
-                    values = (
-                        row.get("Varenavn", ""),
-                        row.get("GTIN", ""),
-                        row.get("EPD", ""),
-                        qty
-                    )
-                    tree.insert(parent, "end", values=values)
-
-            tree.pack(fill='both', expand=True)
-
-            btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
-            btn_row.pack(pady=10)
-
-            from utils.export_thread import threaded_export
-
-            btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
-            btn_row.pack(pady=10)
-
-            from utils.export_thread import threaded_export  # Pass på at dette ligger øverst i filen
-
-            def trigger_excel_export_asn(barcodes=False):
-                file = filedialog.asksaveasfilename(
-                    defaultextension=".xlsx",
-                    filetypes=[("Excel Files", "*.xlsx")],
-                    title="Lagre som"
-                )
-                if file:
-                    threaded_export(
-                        file=file,
-                        result={
-                            "Products": [item for group in result["Packages"].values() for item in group],
-                            "OrderNumber": next((item.get("BuyersOrderNumber") for group in result["Packages"].values() for item in group if item.get("BuyersOrderNumber")), ""),
-                            "OrderDate": "",  # Kan legges til senere om ønskelig
-                        },
-                        with_barcodes=barcodes,
-                        parent_window=self.root,
-                        export_func=export_to_excel_flexible
-                    )
-
-
-            self.create_styled_button(btn_row, text="Eksporter til Excel", command=lambda: trigger_excel_export_asn(False)).pack(side='left', padx=5)
-            self.create_styled_button(btn_row, text="Eksporter til Excel med strekkoder", command=lambda: trigger_excel_export_asn(True)).pack(side='left', padx=5)
-
-            return
-
-
-        # Visning for InvoiceToGoldExtractor
-        if type(self.extractor_instance).__name__ == "InvoiceToGoldExtractor":
-
-            preview = tk.Toplevel(self.extractor)
-            preview.title("Forhåndsvisning – Faktura")
-            preview.configure(bg=BACKGROUND_COLOR)
-
-            tk.Label(preview, text=f"InvoiceNumber: {result['InvoiceNumber']}", font=self.custom_font_bold, bg=BACKGROUND_COLOR).pack()
-            tk.Label(preview, text=f"InvoiceDate: {result['InvoiceDate']}", font=self.custom_font_regular, bg=BACKGROUND_COLOR).pack()
-
-            if result["Products"]:
-                unwanted = ["SupplierProductID", "BuyersProductID"]
-                
-                for p in result["Products"]:
-                    if "Description" in p:
-                        p["Varenavn"] = p.pop("Description")
-
-                ordered_cols = ["Varenavn", "GTIN", "EPD", "UnitPrice", "LineItemAmount", "VatAmount", "QuantityInvoiced"]
-                cols = [col for col in ordered_cols if col in result["Products"][0]]
-
-
-            else:
-                cols = []
-
-            tree = ttk.Treeview(preview, columns=cols, show='headings')
-
-            for col in cols:
-                tree.heading(col, text=col)
-                width = 250 if col == "Varenavn" else 120
-                tree.column(col, width=width, anchor="w")
-
-            for row in result["Products"]:
-                formatted_row = {}
-                for col in cols:
-                    val = row.get(col, "")
-                    if col in ["UnitPrice", "LineItemAmount", "VatAmount"]:
-                        val = format_nok(val)
-                    formatted_row[col] = val
-                tree.insert('', 'end', values=[formatted_row[col] for col in cols])
-
+        job = self.jobs.submit(
+            f"Ekstraher: {preview.title()}", run, self.document.raw,
+            priority=PRIORITY_HIGH, show_panel=False,
+            on_progress=on_progress, on_data=on_data, on_result=on_result, on_error=on_error,
+        )
 
-            tree.pack(fill='both', expand=True)
+        def cancel():
+            self.jobs.cancel(job)
+            cancel_btn.config(state='disabled')
+            label.config(text=f"Avbrutt ({len(products)} rader)")
 
-            btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
-            btn_row.pack(pady=10)
+        def on_close():
+            self.jobs.cancel(job)
+            preview.destroy()
 
-            from utils.export_thread import threaded_export
+        cancel_btn = ttk.Button(status, text="Avbryt", command=cancel)
+        cancel_btn.pack(side='right')
+        preview.protocol("WM_DELETE_WINDOW", on_close)
+        return job
 
-            btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
-            btn_row.pack(pady=10)
+    def export_buttons(self, preview, export_result):
+        # Eksportknappene aktiveres først når ekstraheringen er ferdig;
+        # returnerer funksjonen som gjør det, med resultatet som argument
+        state = {}
 
-            def trigger_invoice_export(barcodes=False):
-                file = filedialog.asksaveasfilename(
-                    defaultextension=".xlsx",
-                    filetypes=[("Excel Files", "*.xlsx")],
-                    title="Lagre som"
+        def trigger_export(barcodes=False):
+            file = filedialog.asksaveasfilename(
+                defaultextension=".xlsx",
+                filetypes=[("Excel Files", "*.xlsx")],
+                title="Lagre som"
+            )
+            if file:
+                threaded_export(
+                    file=file,
+                    result=export_result(state['result']),
+                    with_barcodes=barcodes,
+                    jobs=self.jobs,
+                    parent_window=self.root,
+                    export_func=export_to_excel_flexible
                 )
-                if file:
-                    threaded_export(
-                        file=file,
-                        result=result,
-                        with_barcodes=barcodes,
-                        parent_window=self.root,
-                        export_func=export_to_excel_flexible
-                    )
-
-
-            self.create_styled_button(btn_row, text="Eksporter til Excel", command=lambda: trigger_invoice_export(False)).pack(side='left', padx=5)
-            self.create_styled_button(btn_row, text="Eksporter til Excel med strekkoder", command=lambda: trigger_invoice_export(True)).pack(side='left', padx=5)
-
 
-
-            return
-
-
-     # … din eksisterende preview-kode …
+        btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
+        btn_row.pack(pady=10)
+        buttons = [
+            self.create_styled_button(btn_row, text="Eksporter til Excel", state='disabled', command=lambda: trigger_export(False)),
+            self.create_styled_button(btn_row, text="Eksporter til Excel med strekkoder", state='disabled', command=lambda: trigger_export(True)),
+        ]
+        for btn in buttons:
+            btn.pack(side='left', padx=5)
+
+        def enable(result):
+            state['result'] = result
+            for btn in buttons:
+                btn.config(state='normal')
+        return enable
+
+    # Visning for AdvancedShippingNote
+    def asn_preview(self, extractor):
+        preview = tk.Toplevel(self.extractor)
+        preview.title("Forhåndsvisning – ASN")
+        preview.configure(bg=BACKGROUND_COLOR)
+
+        title_var = tk.StringVar(value="DeliveryNote: ")
+        tk.Label(preview, textvariable=title_var, font=self.custom_font_bold, bg=BACKGROUND_COLOR).pack()
+
+        tree = ttk.Treeview(preview)
+        tree["columns"] = ("Varenavn", "GTIN", "EPD", "Quantity")
+        for col in tree["columns"]:
+            tree.heading(col, text=col)
+            width = 250 if col == "Varenavn" else 130
+            tree.column(col, anchor="w", width=width)
 
         tree.pack(fill='both', expand=True)
 
-        # ── Legg til eksport-knapper ════════════════════════════════════════
-        from utils.export_thread import threaded_export
-        from utils.export_helpers import export_to_excel_flexible  # eller hva helper-funksjonen din heter
-
-        btn_frame = tk.Frame(preview, bg=BACKGROUND_COLOR)
-        btn_frame.pack(pady=10)
-
-        # Funksjon som spør om filnavn og starter eksport i bakgrunn
-        def _trigger_po_export(with_barcodes=False):
-            file = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel-filer", "*.xlsx")],
-                title="Lagre bestilling som…"
+        # Pakkene vises straks; varelinjene settes inn først når en pakke åpnes.
+        # Til da har pakken en tom plassholder, så den får en utvid-pil.
+        packages = {}   # SSCC -> rader
+        parents = {}    # SSCC -> Treeview-id
+        loaded = set()  # SSCC-er som er åpnet
+
+        def insert_item(parent, row):
+            qty = row.get("Quantity", "").replace(" PCE", "").strip()
+            values = (
+                row.get("Varenavn", ""),
+                row.get("GTIN", ""),
+                row.get("EPD", ""),
+                qty
             )
-            if not file:
+            tree.insert(parent, "end", values=values)
+
+        def add_package(ident):
+            packages[ident] = []
+            parents[ident] = parent = tree.insert("", "end", text=ident, open=False)
+            tree.insert(parent, "end", text="…")
+
+        def add_rows(header, batch):
+            title_var.set(f"DeliveryNote: {header['DeliveryNoteNumber']}")
+            # header["SSCC"] har alle ferdige pakker, også de uten varelinjer
+            for ident in header.get("SSCC", ()):
+                if ident not in packages:
+                    add_package(ident)
+            for ident, row in batch:
+                if ident not in packages:
+                    add_package(ident)
+                packages[ident].append(row)
+                if ident in loaded:
+                    insert_item(parents[ident], row)
+
+        def on_open(event):
+            node = tree.focus()
+            ident = tree.item(node, "text")
+            if tree.parent(node) or ident in loaded or ident not in packages:
                 return
+            loaded.add(ident)
+            tree.delete(*tree.get_children(node))
+            rows = packages[ident]
+            buyers_order_number = rows[0].get("BuyersOrderNumber", "") if rows else ""
+            if buyers_order_number:
+                tree.insert(node, "end", text=f"Ordrenummer: {buyers_order_number}")
+            for row in rows:
+                insert_item(node, row)
 
-            # starter popup + tråd som kjører export_to_excel_flexible
-            threaded_export(
-                file=file,
-                result=result,
-                with_barcodes=with_barcodes,
-                parent_window=self.root,
-                export_func=export_to_excel_flexible
-            )
+        tree.bind("<<TreeviewOpen>>", on_open)
 
-        # Knapp for vanlig eksport
-        self.create_styled_button(
-            btn_frame,
-            text="Eksporter til Excel",
-            command=lambda: _trigger_po_export(False)
-        ).pack(side='left', padx=5)
-
-        # Knapp for eksport med strekkoder
-        self.create_styled_button(
-            btn_frame,
-            text="Eksporter til Excel med strekkoder",
-            command=lambda: _trigger_po_export(True)
-        ).pack(side='left', padx=5)
+        enable_export = self.export_buttons(preview, result_for_export)
 
+        def done(result):
+            if not result["Packages"]:
+                messagebox.showinfo("Ingen data", "Ingen pakksedler eller varer ble funnet.")
+                return
+            enable_export(result)
 
-        def export_to_excel():
-            import platform
-            from openpyxl import load_workbook
-            from openpyxl.utils import get_column_letter
+        self.stream_extraction(preview, extractor, add_rows, done)
 
-            file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
-            if file:
-                df = pd.DataFrame(result["Products"])
-                if "Quantity" in df.columns:
-                    cols = [col for col in df.columns if col != "Quantity"] + ["Quantity"]
-                    df = df[cols]
-                    
-                df.to_excel(file, index=False, startrow=3)
-
-                wb = load_workbook(file)
-                ws = wb.active
-
-                if "OrderNumber" in result:
-                    ws["A1"] = f"OrderNumber: {result['OrderNumber']}"
-                    ws["A2"] = f"OrderDate: {result['OrderDate']}"
-                elif "InvoiceNumber" in result:
-                    ws["A1"] = f"InvoiceNumber: {result['InvoiceNumber']}"
-                    ws["A2"] = f"InvoiceDate: {result['InvoiceDate']}"
-                    ws["A3"] = f"Total: {result['Summary']['TotalAmount']}  |  MVA: {result['Summary']['VatAmount']} {result['Summary']['Currency']}"
-
-                for col in range(1, ws.max_column + 1):
-                    max_length = 0
-                    col_letter = get_column_letter(col)
-                    for row in range(1, ws.max_row + 1):
-                        val = ws.cell(row=row, column=col).value
-                        if val:
-                            max_length = max(max_length, len(str(val)))
-                    ws.column_dimensions[col_letter].width = max_length + 2
-
-                wb.save(file)
-
-                if platform.system() == "Windows":
-                    os.startfile(file)
-                elif platform.system() == "Darwin":
-                    os.system(f"open \"{file}\"")
-                else:
-                    os.system(f"xdg-open \"{file}\"")
+    # Visning for InvoiceToGoldExtractor
+    def invoice_preview(self, extractor):
+        preview = tk.Toplevel(self.extractor)
+        preview.title("Forhåndsvisning – Faktura")
+        preview.configure(bg=BACKGROUND_COLOR)
 
-        def export_to_excel_with_barcodes():
-            import platform
-            from openpyxl import load_workbook
-            from openpyxl.utils import get_column_letter
-            from openpyxl.drawing.image import Image
-            from utils.barcode_utils import generate_gtin_barcodes
+        number_var = tk.StringVar(value="InvoiceNumber: ")
+        date_var = tk.StringVar(value="InvoiceDate: ")
+        tk.Label(preview, textvariable=number_var, font=self.custom_font_bold, bg=BACKGROUND_COLOR).pack()
+        tk.Label(preview, textvariable=date_var, font=self.custom_font_regular, bg=BACKGROUND_COLOR).pack()
 
-            file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
-            if not file:
-                return
+        cols = extractor.ITEM_COLUMNS
 
+        def format_row(row):
+            # Kjøres bare for radene som faktisk vises
+            values = []
+            for col in cols:
+                val = row.get(col, "")
+                if col in ["UnitPrice", "LineItemAmount", "VatAmount"]:
+                    val = format_nok(val)
+                values.append(val)
+            return values
+
+        table = VirtualTable(preview, cols, format_row=format_row, widths={"Varenavn": 250})
+        table.pack(fill='both', expand=True)
+
+        def add_rows(header, batch):
+            number_var.set(f"InvoiceNumber: {header['InvoiceNumber']}")
+            date_var.set(f"InvoiceDate: {header['InvoiceDate']}")
+            table.rows.extend(batch)
+            table.rows_added()
+
+        enable_export = self.export_buttons(preview, lambda result: result)
+        self.stream_extraction(preview, extractor, add_rows, enable_export)
+
+    # Visning for OpenPurchaseOrderToAzure
+    def po_preview(self, extractor):
+        preview = tk.Toplevel(self.extractor)
+        preview.title("Forhåndsvisning – Bestilling")
+        preview.configure(bg=BACKGROUND_COLOR)
+
+        number_var = tk.StringVar(value="OrderNumber: ")
+        date_var = tk.StringVar(value="OrderDate: ")
+        tk.Label(preview, textvariable=number_var, font=self.custom_font_bold, bg=BACKGROUND_COLOR).pack()
+        tk.Label(preview, textvariable=date_var, font=self.custom_font_regular, bg=BACKGROUND_COLOR).pack()
+
+        desired_order = ["Varenavn", "REMAid", "EPD", "GTIN", "GTIN-FPAK", "LV", "Quantity"]
+        table = VirtualTable(preview, [], widths={"Varenavn": 250})
+        table.pack(fill='both', expand=True)
+        keys = set()
+
+        def add_rows(header, batch):
+            number_var.set(f"OrderNumber: {header['OrderNumber']}")
+            date_var.set(f"OrderDate: {header['OrderDate']}")
+            table.rows.extend(batch)
+            # Kolonnene følger nøklene i radene (kjente først, resten alfabetisk)
+            batch_keys = {k for row in batch for k in row}
+            if batch_keys - keys:
+                keys.update(batch_keys)
+                table.set_columns([col for col in desired_order if col in keys] + sorted(keys - set(desired_order)))
+            table.rows_added()
+
+        def quantity_last(result):
+            # Samme eksport som de andre, men med Quantity som siste kolonne
             df = pd.DataFrame(result["Products"])
-
             if "Quantity" in df.columns:
                 cols = [col for col in df.columns if col != "Quantity"] + ["Quantity"]
                 df = df[cols]
+            return {**result, "Products": df.to_dict("records")}
 
-            df["GTIN"] = df["GTIN"].astype(str).str.strip()
-
-            df = generate_gtin_barcodes(df)
-            df.to_excel(file, index=False, startrow=3)
-
-            wb = load_workbook(file)
-            ws = wb.active
-
-            if "OrderNumber" in result:
-                ws["A1"] = f"OrderNumber: {result['OrderNumber']}"
-                ws["A2"] = f"OrderDate: {result['OrderDate']}"
-            elif "InvoiceNumber" in result:
-                ws["A1"] = f"InvoiceNumber: {result['InvoiceNumber']}"
-                ws["A2"] = f"InvoiceDate: {result['InvoiceDate']}"
-                ws["A3"] = f"Total: {result['Summary']['TotalAmount']}  |  MVA: {result['Summary']['VatAmount']} {result['Summary']['Currency']}"
-
-            header_row = ws[4]
-            col_map = {cell.value: cell.column for cell in header_row if cell.value}
-            barcode_col = col_map.get("StrekkodeFil")
-
-            if barcode_col:
-                for idx, row in df.iterrows():
-                    img_path = row.get("StrekkodeFil")
-                    if img_path and os.path.exists(img_path):
-                        try:
-                            img = Image(img_path)
-                            img.height = 100
-                            img.width = 300
-                            cell = ws.cell(row=5 + idx, column=barcode_col)
-                            ws.add_image(img, cell.coordinate)
-                            ws.row_dimensions[5 + idx].height = 110
-                        except Exception as e:
-                            print(f"Feil ved bildeinnsetting: {e}")
-
-            for col in range(1, ws.max_column + 1):
-                max_length = 0
-                col_letter = get_column_letter(col)
-                for row in range(1, ws.max_row + 1):
-                    val = ws.cell(row=row, column=col).value
-                    if val:
-                        max_length = max(max_length, len(str(val)))
-                ws.column_dimensions[col_letter].width = max_length + 2
-
-            wb.save(file)
-
-            if platform.system() == "Windows":
-                os.startfile(file)
-            elif platform.system() == "Darwin":
-                os.system(f"open \"{file}\"")
-            else:
-                os.system(f"xdg-open \"{file}\"")
+        enable_export = self.export_buttons(preview, quantity_last)
 
-        btn_row = tk.Frame(preview, bg=BACKGROUND_COLOR)
-        btn_row.pack(pady=10)
+        def done(result):
+            if not result["Products"]:
+                messagebox.showinfo("Ingen data", "Ingen produkter ble funnet.")
+                return
+            enable_export(result)
 
-        self.create_styled_button(btn_row, text="Eksporter til Excel", command=export_to_excel).pack(side='left', padx=5)
-        self.create_styled_button(btn_row, text="Eksporter til Excel med strekkoder", command=export_to_excel_with_barcodes).pack(side='left', padx=5)
+        self.stream_extraction(preview, extractor, add_rows, done)
 
     from utils.gui_utils import center_window
 
@@ -1180,261 +1017,43 @@ Smart Extractor
         ).pack(pady=10)
 
 
-# XML EXTRACTIONS
-class OpenPurchaseOrderToAzureExtractor:
-    def extract(self, xml_string):
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_string.encode('utf-8'), parser)
-
-        def safe_find_text_xpath(ctx, path):
-            node = ctx.xpath(path)
-            if node and isinstance(node[0], etree._Element) and node[0].text:
-                return node[0].text.strip()
-            return ""
-
-        def match(self, xml_text):
-            return "MessageType=\"ORDERS\"" in xml_text or "<Order MessageType=" in xml_text
-
-        def find_ref_value_xpath(root, code_name):
-            for ref in root.xpath(".//*[local-name()='Ref']"):
-                code_node = ref.xpath(".//*[local-name()='Code']")
-                text_node = ref.xpath(".//*[local-name()='Text']")
-                if code_node and text_node and code_node[0].text == code_name:
-                    return text_node[0].text.strip() if text_node[0].text else ""
-            return ""
-
-        order_number = safe_find_text_xpath(root, ".//*[local-name()='OrderNumber']")
-        order_date = find_ref_value_xpath(root, "ORDER_DATE")
-
-        products = []
-        for item in root.xpath(".//*[local-name()='BaseItemDetails']"):
-            rema_id = safe_find_text_xpath(item, ".//*[local-name()='BuyersProductId']")
-            row = {
-                "Varenavn": safe_find_text_xpath(item, ".//*[local-name()='Description']"),
-                "REMAid": rema_id,
-                "Quantity": safe_find_text_xpath(item, ".//*[local-name()='QuantityOrdered']"),
-            }
-
-            for ref in item.xpath(".//*[local-name()='ProductIdentification']//*[local-name()='AdditionalProductId']"):
-                code = safe_find_text_xpath(ref, ".//*[local-name()='Code']").upper()
-                text = safe_find_text_xpath(ref, ".//*[local-name()='Text']")
-                if not code or not text:
-                    continue
-                if code.startswith("GTIN"):
-                    text = clean_gtin(text)
-                row[code] = text
-
-            products.append(row)
-
-        return {
-            "OrderNumber": order_number,
-            "OrderDate": order_date,
-            "Products": products
-        }
-
-
-    def _find_ref_value_xpath(self, root, code_name):
-        for ref in root.xpath(".//*[local-name()='Ref']"):
-            code_node = ref.xpath(".//*[local-name()='Code']")
-            text_node = ref.xpath(".//*[local-name()='Text']")
-            if code_node and text_node and code_node[0].text == code_name:
-                return text_node[0].text.strip() if text_node[0].text else ""
-        return ""
-
-class AdvancedShippingNoteExtractor:
-    def extract(self, xml_string):
-        import random
-        parser = etree.XMLParser(recover=True)
-
-        # Fjern default namespace
-        xml_string = xml_string.replace('xmlns="http://www.ean-nor.no/schemas/eannor"', "")
-        root = etree.fromstring(xml_string.encode('utf-8'), parser)
-
-        delivery_note_number = self._find(root, ".//*[local-name()='DeliveryNoteNumber']")
-        packages = {}
-
-        for delivery_details in root.xpath(".//*[local-name()='DeliveryNoteDetails']"):
-            ident = self._find(delivery_details, ".//*[local-name()='ParcelIdentification']/*[local-name()='IdentFrom']")
-            if not ident:
-                ident = f"UkjentSSCC-{random.randint(1000,9999)}"
-
-            if ident not in packages:
-                packages[ident] = []
-
-            item_nodes = delivery_details.xpath(".//*[local-name()='BaseItemDetails']")
-            print("ANTALL varer funnet i denne DeliveryNoteDetails:", len(item_nodes))  # Debug!
-
-            for item in item_nodes:
-                desc = self._find(item, ".//*[local-name()='Description']")
-                rema_id = self._find(item, ".//*[local-name()='BuyersProductId']")
-                quantity_val = self._find(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='Quantity']")
-                quantity_unit = self._find(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='QuantityUnit']")
-                if quantity_val and quantity_unit:
-                    quantity_str = f"{quantity_val} {quantity_unit}".strip()
-                else:
-                    quantity_str = quantity_val or ""  # fallback
-
-                buyers_order_number = self._find(item, ".//*[local-name()='BuyersOrderInfo']/*[local-name()='OrderNumber']")
-
-                # GTIN-henting
-                gtin_nodes = item.xpath(".//*[local-name()='AdditionalProductId'][*[local-name()='Code']='GTIN']/*[local-name()='Text']/text()")
-                gtin = clean_gtin(gtin_nodes[0]) if gtin_nodes else ""
-                
-                # EPD-henting
-                epd_nodes = item.xpath(".//*[local-name()='AdditionalProductId'][*[local-name()='Code']='EPD']/*[local-name()='Text']/text()")
-                epd = epd_nodes[0] if epd_nodes else ""
-
-                packages[ident].append({
-                    "Varenavn": desc,
-                    "GTIN": gtin,
-                    "EPD": epd,
-                    "REMAid": rema_id,
-                    "BuyersOrderNumber": buyers_order_number,
-                    "Quantity": quantity_str
-                })
-
-        print("DEBUG → Antall pakker:", len(packages))
-        for ident, rows in packages.items():
-            print(f"  SSCC: {ident} har {len(rows)} rader")
-
-        return {
-            "DeliveryNoteNumber": delivery_note_number,
-            "Packages": packages
-        }
-
-    def _find(self, ctx, path):
-        res = ctx.xpath(path)
-        return res[0].text.strip() if res and res[0].text else ""
-
-
-class InvoiceToGoldExtractor(SmartXMLExtractor):
-    def __init__(self):
-        super().__init__(
-            parent_tag="BaseItemDetails",
-            child_tags=[
-                "Description",
-                "GTIN",
-                "EPD",
-                "UnitPrice",
-                "LineItemAmount",
-                "VatAmount",
-                "QuantityInvoiced",
-            ],
-            deep=True
-        )
-
-    def extract(self, xml_text):
-        print("[INFO] Starter InvoiceToGoldExtractor.extract()")
-
-        parser = etree.XMLParser(recover=True)
-        try:
-            root = etree.fromstring(xml_text.encode(), parser=parser)
-        except Exception as e:
-            print(f"[ERROR] Kunne ikke parse XML: {e}")
-            return {
-                "InvoiceNumber": "",
-                "InvoiceDate": "",
-                "Products": [],
-                "Summary": {}
-            }
-
-        items = root.xpath(".//*[local-name()='BaseItemDetails']")
-        print(f"[INFO] Antall <BaseItemDetails>-elementer funnet: {len(items)}")
-
-        products = []
+# Strømmende forhåndsvisning: rader sendes i bolker på maks så mange rader,
+# eller oftere hvis det har gått så lang tid siden forrige bolk
+PREVIEW_BATCH_ROWS = 500
+PREVIEW_BATCH_SECONDS = 0.1
 
-        def safe_find(context, path):
-            try:
-                res = context.xpath(path)
-                return res[0].text.strip() if res and res[0].text else ""
-            except Exception as e:
-                print(f"[WARN] XPath-feil på path '{path}': {e}")
-                return ""
-
-        for idx, item in enumerate(items):
-            try:
-                product = {
-                    "Varenavn": safe_find(item, ".//*[local-name()='Description']"),
-                    "GTIN": clean_gtin(safe_find(item, ".//*[local-name()='AdditionalProductId'][*[local-name()='Code']='GTIN']/*[local-name()='Text']")),
-                    "EPD": safe_find(item, ".//*[local-name()='AdditionalProductId'][*[local-name()='Code']='EPD']/*[local-name()='Text']"),
-                    "UnitPrice": safe_find(item, ".//*[local-name()='UnitPrice']"),
-                    "LineItemAmount": safe_find(item, ".//*[local-name()='LineItemAmount']"),
-                    "VatAmount": safe_find(item, ".//*[local-name()='VatAmount']"),
-                    "QuantityInvoiced": safe_find(item, ".//*[local-name()='QuantityInvoiced']")
-                }
-                products.append(product)
-                print(f"[DEBUG] Produkt {idx+1}: {product}")
-            except Exception as e:
-                print(f"[ERROR] Feil ved produkt {idx+1}: {e}")
-
-        # Metadata
-        invoice_number = safe_find(root, ".//*[local-name()='InvoiceNumber']")
-        invoice_date = safe_find(root, ".//*[local-name()='InvoiceDate']")
-        total_amount = safe_find(root, ".//*[local-name()='LineItemTotalsAmount']")
-        vat_amount = safe_find(root, ".//*[local-name()='VatAmount']")
-        currency = safe_find(root, ".//*[local-name()='Currency']")
-
-        print(f"[INFO] Hentet {len(products)} produkter. Fakturanr: {invoice_number}, Dato: {invoice_date}")
-
-        return {
-            "InvoiceNumber": invoice_number,
-            "InvoiceDate": invoice_date,
-            "Products": products,
-            "Summary": {
-                "TotalAmount": total_amount,
-                "VatAmount": vat_amount,
-                "Currency": currency
-            }
-        }
-
-
-# EXTRACTOR REGISTRERING
-register_extractor(
-    "ASN",
-    lambda xml: "<deliverynotedetails" in xml.lower() or "<deliverynote>" in xml.lower(),
-    AdvancedShippingNoteExtractor
-)
 
-print("[DEBUG] Ferdig med registrering av extractors", flush=True)
-
-
-def is_invoice_to_gold(xml: str) -> bool:
-    try:
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml.encode("utf-8"), parser=parser)
-        has_number = root.xpath(".//*[local-name()='InvoiceNumber']")
-        has_date = root.xpath(".//*[local-name()='InvoiceDate']")
-        return bool(has_number and has_date)
-    except Exception as e:
-        print(f"[DEBUG] is_invoice_to_gold() feilet: {e}", flush=True)
-        return False
-
-register_extractor(
-    "InvoiceToGold",
-    is_invoice_to_gold,
-    InvoiceToGoldExtractor
-)
-print("[DEBUG] Ferdig med registrering av extractors", flush=True)
-
-register_extractor(
-    "POtoAzure",
-    lambda xml: 'messagetype="orders"' in xml.lower() or "open purchase order to azure" in xml.lower(),
-    OpenPurchaseOrderToAzureExtractor
-)
-
-print("[DEBUG] Ferdig med registrering av extractors", flush=True)
-
-
-# 🔜 Placeholder: Register new extractors as needed
-# register_extractor("INVOICE", lambda xml: "<invoice" in xml.lower(), InvoiceExtractor)
-# register_extractor("RETURN", lambda xml: "<return" in xml.lower(), ReturnNoteExtractor)
+def iter_product_batches(extractor, source, header,
+                         batch_rows=PREVIEW_BATCH_ROWS, batch_seconds=PREVIEW_BATCH_SECONDS):
+    # extractor.iter_products i bolker (lister); header fylles underveis
+    batch, last = [], time.perf_counter()
+    for product in extractor.iter_products(source, header):
+        batch.append(product)
+        now = time.perf_counter()
+        if len(batch) >= batch_rows or now - last >= batch_seconds:
+            yield batch
+            batch, last = [], now
+    if batch:
+        yield batch
 
 
 if __name__ == "__main__":
-    print("[MAIN] Starter FIKS Tools", flush=True)
-    check_for_update()
+    tracing.enable_from_env()
+    if "--profile-startup" in sys.argv:
+        from utils.startup_profile import profile_startup
+        sys.exit(profile_startup(os.path.abspath(__file__), STARTUP_BUDGET_MS))
+    startup_probe = "--startup-probe" in sys.argv
+
+    log.info("Starter FIKS Tools %s", CURRENT_VERSION)
     root = tk.Tk()
     app = FIKSToolsApp(root)
     center_window(root)
 
+    if startup_probe:
+        # Kjøres av --profile-startup: tegn vinduet, rapporter tiden og avslutt
+        root.update()
+        print(f"[STARTUP] vindu tegnet etter {(time.perf_counter() - _STARTUP_T0) * 1000:.0f} ms", flush=True)
+        root.destroy()
+        sys.exit(0)
+
     root.mainloop()
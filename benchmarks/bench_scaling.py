@@ -0,0 +1,128 @@
+"""
+Skalerings-benchmarks med pytest-benchmark: gjenkjenning, ekstrahering,
+strekkoder og Excel-eksport for syntetiske meldinger (se edi_generator.py)
+i flere størrelser.
+
+Kjør fra repo-roten (filen angis eksplisitt, den samles ikke inn av en
+vanlig pytest-kjøring):
+
+    # lagre baseline som JSON i benchmarks/baselines/<maskin>/
+    python -m pytest benchmarks/bench_scaling.py --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+
+    # sammenlign med siste lagrede kjøring, feil ved mer enn 25 % tregere median
+    python -m pytest benchmarks/bench_scaling.py --benchmark-storage=benchmarks/baselines \\
+        --benchmark-compare --benchmark-compare-fail=median:25%
+
+Størrelser styres med miljøvariabler (antall varelinjer, kommaseparert):
+    FIKS_BENCH_SIZES=10,1000,100000,1000000   detect/extract/eksport
+    FIKS_BENCH_BARCODE_MAX=10000              største størrelse med strekkoder
+"""
+import functools
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import fiks_core
+from edi_generator import KINDS, generate
+
+
+def _sizes(name, default):
+    return [int(s) for s in os.environ.get(name, default).split(",") if s.strip()]
+
+
+SIZES = _sizes("FIKS_BENCH_SIZES", "10,1000,100000")
+BARCODE_MAX = int(os.environ.get("FIKS_BENCH_BARCODE_MAX", "10000"))
+BARCODE_SIZES = [size for size in SIZES if size <= BARCODE_MAX]
+
+
+@functools.lru_cache(maxsize=None)
+def document(kind, size) -> bytes:
+    return generate(kind, size)
+
+
+@functools.lru_cache(maxsize=4)
+def export_result(kind, size):
+    doc = fiks_core.ParsedDocument(document(kind, size))
+    return fiks_core.result_for_export(doc.result)
+
+
+@pytest.fixture
+def scratch_dir():
+    path = tempfile.mkdtemp(prefix="fiks-bench-")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("kind", KINDS)
+def test_detect(benchmark, kind, size):
+    raw = document(kind, size)
+    benchmark.group = f"detect-{kind}"
+    extractor = benchmark(fiks_core.detect_extractor, raw)
+    assert type(extractor).__name__ == {
+        "ORDERS": "OpenPurchaseOrderToAzureExtractor",
+        "DESADV": "AdvancedShippingNoteExtractor",
+        "INVOIC": "InvoiceToGoldExtractor",
+    }[kind]
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("kind", KINDS)
+def test_extract(benchmark, kind, size):
+    # Parsing er med: hver runde får et nytt ParsedDocument fra rå bytes
+    raw = document(kind, size)
+    extractor = fiks_core.detect_extractor(raw)
+    benchmark.group = f"extract-{kind}"
+    result = benchmark(lambda: extractor.extract(fiks_core.ParsedDocument(raw)))
+    assert len(fiks_core.result_for_export(result)["Products"]) == size
+
+
+@pytest.mark.parametrize("size", BARCODE_SIZES)
+def test_barcodes(benchmark, size):
+    # Tom strekkode-cache i hver runde, ellers måles bare cache-treff
+    import pandas as pd
+    from utils.barcode_utils import generate_gtin_barcodes
+
+    df = pd.DataFrame(export_result("INVOIC", size)["Products"])
+    cache_dirs = []
+
+    def setup():
+        cache_dirs.append(tempfile.mkdtemp(prefix="fiks-bench-barcodes-"))
+        return (df.copy(), cache_dirs[-1]), {}
+
+    benchmark.group = "barcodes"
+    try:
+        out = benchmark.pedantic(generate_gtin_barcodes, setup=setup, rounds=3)
+    finally:
+        for path in cache_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+    assert out["StrekkodeFil"].notna().all()
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("kind", KINDS)
+def test_export(benchmark, kind, size, scratch_dir):
+    result = export_result(kind, size)
+    out = os.path.join(scratch_dir, "export.xlsx")
+    benchmark.group = f"export-{kind}"
+    benchmark(fiks_core.export_to_excel_flexible, out, result, open_after=False)
+    assert os.path.getsize(out) > 0
+
+
+@pytest.mark.parametrize("size", BARCODE_SIZES)
+def test_export_with_barcodes(benchmark, size, scratch_dir):
+    # Strekkodene ligger i cachen etter første runde; dette måler innliming av bildene
+    result = export_result("INVOIC", size)
+    out = os.path.join(scratch_dir, "export.xlsx")
+    benchmark.group = "export-barcodes"
+    benchmark(fiks_core.export_to_excel_flexible, out, result, with_barcodes=True,
+              barcode_dir=os.path.join(scratch_dir, "barcodes"), open_after=False)
+    assert os.path.getsize(out) > 0
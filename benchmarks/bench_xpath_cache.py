@@ -0,0 +1,90 @@
+"""
+Mikro-benchmark: tid per varelinje med og uten XPath-registeret i
+utils/xpath_cache (compiled()).
+
+Kjør fra repo-roten:
+    python benchmarks/bench_xpath_cache.py [antall_linjer]
+
+"Før" sender de samme local-name()-uttrykkene rett til ctx.xpath(str),
+som kompilerer uttrykket på nytt ved hvert kall. "Etter" er gjeldende
+_item_row i AdvancedShippingNoteExtractor (_find/find_code_text) og
+OpenPurchaseOrderToAzureExtractor (_safe_find_text_xpath), som slår opp
+ferdigkompilerte etree.XPath-objekter. Fakturaen er ikke med: den leser
+varelinjene med SmartXMLExtractor.walk_element og bruker ikke XPath.
+"""
+import os
+import sys
+import time
+
+from lxml import etree
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import fiks_core
+from edi_generator import generate
+from utils.xpath_cache import find_all
+
+
+def xpath_text(ctx, path):
+    res = ctx.xpath(path)
+    return res[0].text.strip() if res and isinstance(res[0], etree._Element) and res[0].text else ""
+
+
+def asn_row_uncached(item):
+    def code_text(code):
+        return xpath_text(item, ".//*[local-name()='AdditionalProductId']"
+                                f"[*[local-name()='Code']='{code}']/*[local-name()='Text']")
+
+    quantity_val = xpath_text(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='Quantity']")
+    quantity_unit = xpath_text(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='QuantityUnit']")
+    return {
+        "Varenavn": xpath_text(item, ".//*[local-name()='Description']"),
+        "GTIN": fiks_core.clean_gtin(code_text("GTIN")),
+        "EPD": code_text("EPD"),
+        "REMAid": xpath_text(item, ".//*[local-name()='BuyersProductId']"),
+        "BuyersOrderNumber": xpath_text(item, ".//*[local-name()='BuyersOrderInfo']/*[local-name()='OrderNumber']"),
+        "Quantity": f"{quantity_val} {quantity_unit}".strip() if quantity_val and quantity_unit else quantity_val,
+    }
+
+
+def po_row_uncached(item):
+    row = {
+        "Varenavn": xpath_text(item, ".//*[local-name()='Description']"),
+        "REMAid": xpath_text(item, ".//*[local-name()='BuyersProductId']"),
+        "Quantity": xpath_text(item, ".//*[local-name()='QuantityOrdered']"),
+    }
+    for ref in item.xpath(".//*[local-name()='ProductIdentification']//*[local-name()='AdditionalProductId']"):
+        code = xpath_text(ref, ".//*[local-name()='Code']").upper()
+        text = xpath_text(ref, ".//*[local-name()='Text']")
+        if not code or not text:
+            continue
+        row[code] = fiks_core.clean_gtin(text) if code.startswith("GTIN") else text
+    return row
+
+
+def timed(label, func, items):
+    start = time.perf_counter()
+    rows = [func(item) for item in items]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} {elapsed:8.3f} s totalt  {elapsed / len(items) * 1e6:8.2f} µs/linje")
+    return rows
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    cases = (
+        ("DESADV", fiks_core.AdvancedShippingNoteExtractor(), asn_row_uncached),
+        ("ORDERS", fiks_core.OpenPurchaseOrderToAzureExtractor(), po_row_uncached),
+    )
+    for kind, extractor, uncached in cases:
+        root = etree.fromstring(generate(kind, lines), etree.XMLParser(recover=True, huge_tree=True))
+        items = find_all(root, "BaseItemDetails")
+        print(f"{kind}: {len(items)} varelinjer")
+        before = timed("før", uncached, items)
+        after = timed("etter", extractor._item_row, items)
+        assert before == after, "Resultatene er ulike!"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Syntetiske EAN-NOR-meldinger til benchmarks og minnemålinger.
+
+    ORDERS  -> OpenPurchaseOrderToAzureExtractor
+    DESADV  -> AdvancedShippingNoteExtractor (varelinjene fordelt på N SSCC-pakker)
+    INVOIC  -> InvoiceToGoldExtractor
+
+GTIN-13 og SSCC-18 får riktig kontrollsiffer, og samme (type, linjer,
+pakker, seed) gir alltid samme bytes. Dokumentet bygges i biter, så
+write_document() kan lage filer med 1M linjer uten å holde alt i minnet.
+
+Kjør fra repo-roten:
+    python benchmarks/edi_generator.py DESADV 100000 --packages 500 -o desadv.xml
+"""
+import argparse
+import random
+import sys
+
+NAMESPACE = "http://www.ean-nor.no/schemas/eannor"
+KINDS = ("ORDERS", "DESADV", "INVOIC")
+DEFAULT_LINES_PER_PACKAGE = 20
+# Antall varelinjer som slås sammen til én streng før den gis videre
+CHUNK_LINES = 1000
+
+
+def check_digit(digits: str) -> str:
+    # GS1 mod 10: vekt 3 og 1 annenhver gang, regnet fra høyre
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return str(-total % 10)
+
+
+def gtin13(n: int) -> str:
+    body = f"70{n % 10**10:010d}"
+    return body + check_digit(body)
+
+
+def sscc18(n: int) -> str:
+    # Utvidelsessiffer 3 + firmaprefiks 7032069 + løpenummer
+    body = f"37032069{n % 10**9:09d}"
+    return body + check_digit(body)
+
+
+def _item(kind, i, rng):
+    quantity = rng.randint(1, 48)
+    if kind == "ORDERS":
+        lines = f"<QuantityOrdered>{quantity}</QuantityOrdered>"
+    elif kind == "DESADV":
+        lines = (f"<DeliveredQuantity><Quantity>{quantity}</Quantity><QuantityUnit>PCE</QuantityUnit></DeliveredQuantity>"
+                 f"<BuyersOrderInfo><OrderNumber>PO{100000 + i // 500}</OrderNumber></BuyersOrderInfo>")
+    else:
+        price = rng.randint(100, 99900) / 100
+        amount = round(price * quantity, 2)
+        lines = (f"<QuantityInvoiced>{quantity}</QuantityInvoiced><UnitPrice>{price:.2f}</UnitPrice>"
+                 f"<LineItemAmount>{amount:.2f}</LineItemAmount><VatAmount>{amount * 0.25:.2f}</VatAmount>")
+    return (
+        f"<BaseItemDetails><LineItemNum>{i + 1}</LineItemNum>"
+        f"<SuppliersProductId>L{i:07d}</SuppliersProductId><BuyersProductId>{200000 + i}</BuyersProductId>"
+        f"<Description>Testvare {i + 1}</Description>{lines}"
+        f"<ProductIdentification>"
+        f"<AdditionalProductId><Code>GTIN</Code><Text>{gtin13(i)}</Text></AdditionalProductId>"
+        f"<AdditionalProductId><Code>EPD</Code><Text>{1000000 + i}</Text></AdditionalProductId>"
+        f"</ProductIdentification></BaseItemDetails>"
+    )
+
+
+def _items(kind, start, stop, rng):
+    for begin in range(start, stop, CHUNK_LINES):
+        yield "".join(_item(kind, i, rng) for i in range(begin, min(stop, begin + CHUNK_LINES)))
+
+
+def iter_document(kind, lines, packages=None, seed=0):
+    """Gir dokumentet som tekstbiter; kind er ORDERS, DESADV eller INVOIC.
+
+    packages gjelder bare DESADV: antall SSCC-pakker linjene fordeles jevnt
+    på (standard: én pakke per DEFAULT_LINES_PER_PACKAGE linjer).
+    """
+    kind = kind.upper()
+    if kind not in KINDS:
+        raise ValueError(f"Ukjent meldingstype {kind!r}, bruk en av {', '.join(KINDS)}")
+    rng = random.Random(seed)
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+
+    if kind == "ORDERS":
+        yield (f'<Order xmlns="{NAMESPACE}" MessageType="ORDERS"><OrderHeader>'
+               "<OrderNumber>PO100000</OrderNumber>"
+               "<Ref><Code>ORDER_DATE</Code><Text>2025-01-15</Text></Ref>"
+               "</OrderHeader><OrderDetails>")
+        yield from _items(kind, 0, lines, rng)
+        yield "</OrderDetails></Order>"
+
+    elif kind == "DESADV":
+        if packages is None:
+            packages = -(-lines // DEFAULT_LINES_PER_PACKAGE)
+        packages = max(1, min(packages, lines)) if lines else 0
+        yield (f'<DeliveryNote xmlns="{NAMESPACE}" MessageType="DESADV"><DeliveryNoteHeader>'
+               "<DeliveryNoteNumber>DN100000</DeliveryNoteNumber>"
+               "</DeliveryNoteHeader>")
+        for p in range(packages):
+            yield (f"<DeliveryNoteDetails><ParcelIdentification>"
+                   f"<IdentFrom>{sscc18(p)}</IdentFrom></ParcelIdentification>")
+            yield from _items(kind, lines * p // packages, lines * (p + 1) // packages, rng)
+            yield "</DeliveryNoteDetails>"
+        yield "</DeliveryNote>"
+
+    else:
+        # Fakturahodet har ingen VatAmount, så første VatAmount i dokumentet
+        # (det extractoren bruker som summering) kommer fra første varelinje
+        yield (f'<Invoice xmlns="{NAMESPACE}" MessageType="INVOIC"><InvoiceHeader>'
+               "<InvoiceNumber>F100000</InvoiceNumber><InvoiceDate>2025-02-01</InvoiceDate>"
+               "</InvoiceHeader><InvoiceDetails>")
+        yield from _items(kind, 0, lines, rng)
+        yield ("</InvoiceDetails><InvoiceSummary><LineItemTotalsAmount>0.00</LineItemTotalsAmount>"
+               "<Currency>NOK</Currency></InvoiceSummary></Invoice>")
+
+
+def generate(kind, lines, packages=None, seed=0) -> bytes:
+    return "".join(iter_document(kind, lines, packages, seed)).encode("utf-8")
+
+
+def write_document(path, kind, lines, packages=None, seed=0) -> int:
+    # Skriver dokumentet bit for bit og returnerer antall bytes
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in iter_document(kind, lines, packages, seed):
+            size += f.write(chunk)
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lag syntetiske EAN-NOR-meldinger.")
+    parser.add_argument("kind", type=str.upper, choices=KINDS)
+    parser.add_argument("lines", type=int, help="Antall varelinjer (10 til 1 000 000)")
+    parser.add_argument("--packages", type=int, help="Antall SSCC-pakker (bare DESADV)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Filnavn (standard: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        size = write_document(args.output, args.kind, args.lines, args.packages, args.seed)
+        print(f"{args.output}: {args.lines} linjer, {size / 1e6:.1f} MB")
+    else:
+        for chunk in iter_document(args.kind, args.lines, args.packages, args.seed):
+            sys.stdout.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
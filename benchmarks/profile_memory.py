@@ -0,0 +1,260 @@
+"""
+Minneprofil for hele eksportløpet på en generert (eller gitt) melding:
+
+    extract_clean_xml_block -> parse_xml -> detect_extractor -> extract
+        -> dataframe -> export (export_to_excel_flexible med strekkoder)
+
+For hvert steg måles toppen i Python-allokeringer (tracemalloc) og toppen
+i RSS (samplet i en egen tråd), og de største allokeringsstedene skrives
+ut. RSS tar også med libxml2 og PIL, som tracemalloc ikke ser; minnet
+tracemalloc selv bruker, trekkes fra. --rss-only hopper over tracemalloc
+og går omtrent dobbelt så fort.
+Stegene beholder resultatene sine slik GUI-et gjør (rå tekst, parset
+dokument og resultat lever samtidig), så RSS vokser gjennom løpet.
+
+Kjør fra repo-roten:
+    python benchmarks/profile_memory.py DESADV 50000 --packages 2500
+    python benchmarks/profile_memory.py --input stor_asn.xml --budget-mb 150
+
+Avslutter med kode 1 hvis RSS-toppen over utgangspunktet er større enn
+budsjettet: --budget-mb (standard BUDGET_MB_PER_10K_LINES) per påbegynte
+10 000 varelinjer. Strekkodene tegnes i samme prosess (barcode_workers=1),
+ellers ville minnet i arbeidsprosessene ikke blitt målt.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import fiks_core
+from edi_generator import KINDS, generate
+
+BUDGET_MB_PER_10K_LINES = 200
+RSS_SAMPLE_INTERVAL = 0.005
+TOP_SITES = 5
+MB = 1024 * 1024
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def current_rss():
+    # Bytes, eller None der det ikke kan leses (Windows uten psutil)
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RSSSampler:
+    # Leser RSS i bakgrunnen og husker høyeste verdi siden reset()
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None and tracemalloc.is_tracing():
+            # tracemalloc sin egen bokføring er ikke en del av programmet
+            rss -= tracemalloc.get_tracemalloc_memory()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return rss
+
+    def reset(self):
+        self.peak = current_rss()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def _own_filtered(snapshot):
+    # Målingens egne allokeringer (sampler, snapshots) skal ikke med i listene
+    return snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.traced_peak = None
+        self.traced_after = None
+        self.rss_peak = None
+        self.rss_after = None
+        self.top = []
+
+
+class MemoryProfile:
+    """Kjører stegene etter hverandre og samler målingene.
+
+    snapshot() kan kalles inne i et steg for å ta allokeringsstedene på et
+    bestemt punkt (f.eks. like før arbeidsboken lagres); ellers tas de når
+    steget er ferdig. Stedene er økningen fra starten av steget.
+    """
+    def __init__(self, sampler, top=TOP_SITES):
+        self.sampler = sampler
+        self.top = top
+        self.stages = []
+        self._current = None
+        self._before = None
+
+    def run(self, name, fn, *args, **kwargs):
+        stage = self._current = Stage(name)
+        if tracemalloc.is_tracing():
+            self._before = _own_filtered(tracemalloc.take_snapshot())
+            tracemalloc.reset_peak()
+        self.sampler.reset()
+        start = time.perf_counter()
+        try:
+            value = fn(*args, **kwargs)
+        finally:
+            stage.seconds = time.perf_counter() - start
+            if tracemalloc.is_tracing():
+                stage.traced_after, stage.traced_peak = tracemalloc.get_traced_memory()
+            stage.rss_after = self.sampler.sample()
+            stage.rss_peak = self.sampler.peak
+            if not stage.top:
+                self.snapshot()
+            self.stages.append(stage)
+            self._current = self._before = None
+        return value
+
+    def snapshot(self):
+        if self._current is None or not tracemalloc.is_tracing():
+            return
+        diff = _own_filtered(tracemalloc.take_snapshot()).compare_to(self._before, "lineno")
+        self._current.top = [d for d in diff if d.size_diff > 0][:self.top]
+
+    def report(self, rss_start):
+        def mb(value):
+            return f"{'-':>9}" if value is None else f"{value / MB:9.1f}"
+
+        print(f"{'steg':<24} {'tid (s)':>8} {'py topp':>9} {'py etter':>9} {'RSS topp':>9} {'RSS etter':>9}  (MB)")
+        for s in self.stages:
+            print(f"{s.name:<24} {s.seconds:8.2f} {mb(s.traced_peak)} {mb(s.traced_after)} "
+                  f"{mb(s.rss_peak)} {mb(s.rss_after)}")
+        if rss_start is not None:
+            print(f"{'(RSS ved start)':<24} {'':>8} {'':>9} {'':>9} {mb(rss_start)}")
+
+        for s in self.stages:
+            if not s.top:
+                continue
+            print(f"\nStørste allokeringssteder i {s.name}:")
+            for stat in s.top:
+                frame = stat.traceback[0]
+                print(f"  {stat.size_diff / MB:8.2f} MB {stat.count_diff:>9} blokker  "
+                      f"{frame.filename}:{frame.lineno}")
+
+
+def run_pipeline(profile, raw_text, out_dir):
+    import pandas as pd
+
+    doc = profile.run("extract_clean_xml_block", fiks_core.ParsedDocument.from_text, raw_text)
+    profile.run("parse_xml", lambda: doc.root)
+    extractor = profile.run("detect_extractor", lambda: doc.extractor)
+    result = profile.run("extract", lambda: extractor.extract(doc))
+    export = fiks_core.result_for_export(result)
+    df = profile.run("dataframe", pd.DataFrame, export["Products"])
+
+    # Siste check_cancel-kall kommer like før lagring, når alle rader og
+    # bilder ligger i arbeidsboken – der tas allokeringsstedene
+    calls = [0]
+    rows = len(export["Products"])
+
+    def check_cancel():
+        calls[0] += 1
+        if calls[0] > rows // 1000:
+            profile.snapshot()
+
+    profile.run("export", fiks_core.export_to_excel_flexible,
+                os.path.join(out_dir, "export.xlsx"), export, with_barcodes=True,
+                barcode_dir=os.path.join(out_dir, "barcodes"), barcode_workers=1,
+                open_after=False, check_cancel=check_cancel)
+    return rows, df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minneprofil for ekstrahering og eksport med strekkoder.")
+    parser.add_argument("kind", nargs="?", type=str.upper, choices=KINDS, default="DESADV")
+    parser.add_argument("lines", nargs="?", type=int, default=10000)
+    parser.add_argument("--packages", type=int, help="Antall SSCC-pakker (bare DESADV)")
+    parser.add_argument("--input", help="Bruk denne XML-filen i stedet for en generert melding")
+    parser.add_argument("--budget-mb", type=float, default=BUDGET_MB_PER_10K_LINES,
+                        help="Tillatt RSS-vekst per påbegynte 10 000 linjer (MB)")
+    parser.add_argument("--top", type=int, default=TOP_SITES, help="Antall allokeringssteder per steg")
+    parser.add_argument("--frames", type=int, default=1, help="Rammer tracemalloc lagrer per allokering")
+    parser.add_argument("--rss-only", action="store_true",
+                        help="Bare RSS, uten tracemalloc (raskere)")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, encoding="utf-8", errors="replace") as f:
+            raw_text = f.read()
+        label = args.input
+    else:
+        raw_text = generate(args.kind, args.lines, args.packages).decode("utf-8")
+        label = f"{args.kind} {args.lines} linjer"
+    print(f"{label}: {len(raw_text) / MB:.1f} MB tekst")
+
+    out_dir = tempfile.mkdtemp(prefix="fiks-memory-")
+    try:
+        # Et lite oppvarmingsløp laster modulene og XPath-cachen, så de
+        # ikke havner i målingen av første steg som bruker dem
+        run_pipeline(MemoryProfile(RSSSampler()), generate("DESADV", 10).decode("utf-8"),
+                     tempfile.mkdtemp(dir=out_dir))
+        if not args.rss_only:
+            tracemalloc.start(args.frames)
+        with RSSSampler() as sampler:
+            rss_start = sampler.sample()
+            profile = MemoryProfile(sampler, top=args.top)
+            rows, _ = run_pipeline(profile, raw_text, out_dir)
+            rss_peak = max((s.rss_peak for s in profile.stages if s.rss_peak is not None), default=None)
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    print()
+    profile.report(rss_start)
+
+    if rss_start is None or rss_peak is None:
+        print("\nRSS kan ikke leses på denne plattformen (installer psutil); budsjettet sjekkes ikke")
+        return 0
+    budget = args.budget_mb * max(1, -(-rows // 10000))
+    used = (rss_peak - rss_start) / MB
+    print(f"\n{rows} linjer: RSS-topp {used:.1f} MB over start, budsjett {budget:.0f} MB "
+          f"({args.budget_mb:g} MB per 10 000 linjer)")
+    if used > budget:
+        print("OVER BUDSJETT")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+fiks_core: gjenkjenning, ekstrahering og Excel-eksport av EAN-NOR-meldinger
+uten GUI. Brukes av Tk-appen, batch-kjøringen (python -m fiks_core batch)
+og arbeidsprosessene deres; import laster verken tkinter, pygame, lxml
+eller pandas (de to siste hentes først når de trengs).
+
+    import fiks_core
+    doc = fiks_core.parse(open("ordre.xml", "rb").read())
+    result = fiks_core.extract(doc)
+    fiks_core.export(result, "ordre.xlsx", with_barcodes=True)
+"""
+import os
+
+from fiks_core.document import (
+    ParsedDocument, ProgressReader, as_document, extract_clean_xml_block,
+    get_unique_tags, iterparse_items, local_name, sanitize_input, sniff_elements,
+)
+from fiks_core.export import (
+    export_header_lines, export_to_excel_flexible, excel_column_widths, result_for_export,
+)
+from fiks_core.extractors import (
+    EXTRACTOR_REGISTRY, AdvancedShippingNoteExtractor, InvoiceToGoldExtractor,
+    OpenPurchaseOrderToAzureExtractor, SmartXMLExtractor, detect_extractor, register_extractor,
+)
+from fiks_core.formatting import clean_gtin, format_nok
+
+__all__ = [
+    "parse", "detect", "extract", "export",
+    "ParsedDocument", "ProgressReader", "as_document", "extract_clean_xml_block",
+    "get_unique_tags", "iterparse_items", "local_name", "sanitize_input", "sniff_elements",
+    "export_header_lines", "export_to_excel_flexible", "excel_column_widths", "result_for_export",
+    "EXTRACTOR_REGISTRY", "AdvancedShippingNoteExtractor", "InvoiceToGoldExtractor",
+    "OpenPurchaseOrderToAzureExtractor", "SmartXMLExtractor", "detect_extractor", "register_extractor",
+    "clean_gtin", "format_nok",
+]
+
+
+def parse(source) -> ParsedDocument:
+    """ParsedDocument fra innlimt tekst (str), rå bytes eller en filsti.
+
+    Tekst ryddes som i GUI-et (se extract_clean_xml_block); bytes og filer
+    brukes som de er. Selve parsingen skjer først når roten trengs.
+    """
+    if isinstance(source, ParsedDocument):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return ParsedDocument(bytes(source))
+    if isinstance(source, os.PathLike) or (isinstance(source, str) and '<' not in source):
+        with open(source, 'rb') as f:
+            return ParsedDocument(f.read())
+    return ParsedDocument.from_text(source)
+
+
+def detect(source):
+    # Extractor-instansen som passer dokumentet (ValueError for ukjent type)
+    return parse(source).extractor
+
+
+def extract(source) -> dict:
+    # Resultatet fra extractoren, i samme form som forhåndsvisningen bruker
+    return parse(source).result
+
+
+def export(result, path, with_barcodes=False, **kwargs):
+    # Excel-fil fra et resultat fra extract(); åpnes ikke etterpå
+    kwargs.setdefault("open_after", False)
+    export_to_excel_flexible(path, result_for_export(result), with_barcodes=with_barcodes, **kwargs)
+    return path
@@ -0,0 +1,11 @@
+# python -m fiks_core batch <inn_mappe> <ut_mappe> [--workers N] [--barcodes]
+import multiprocessing
+import sys
+
+from fiks_core.batch import run_batch
+from utils import tracing
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    tracing.enable_from_env()
+    sys.exit(run_batch(sys.argv[1:]))
@@ -0,0 +1,69 @@
+# fiks_core/batch.py
+# Konvertering av en hel mappe uten GUI, fordelt på en prosesspool.
+# Arbeidsprosessene importerer bare fiks_core, ikke Tk-appen.
+import os
+import time
+
+from fiks_core.document import ParsedDocument
+from fiks_core.export import export_to_excel_flexible, result_for_export
+
+
+# python -m fiks_core batch <inn_mappe> <ut_mappe> [--workers N] [--barcodes]
+# (FIKS_Tools_v1.2.py batch ... gjør det samme)
+def batch_convert_file(in_path, out_path, with_barcodes=False):
+    # Kjøres i en arbeidsprosess: én XML-fil -> én Excel-fil
+    start = time.perf_counter()
+    with open(in_path, 'rb') as f:
+        doc = ParsedDocument(f.read())
+    name = type(doc.extractor).__name__
+    result = result_for_export(doc.result)
+    # Filene fordeles allerede på prosesser, så strekkodene tegnes serielt her;
+    # strekkode-cachen er trygg å dele mellom prosessene
+    export_to_excel_flexible(out_path, result, with_barcodes=with_barcodes,
+                             open_after=False, barcode_workers=1)
+    return name, len(result["Products"]), time.perf_counter() - start
+
+
+def run_batch(argv):
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(prog="fiks-tools", description="Konverter XML-meldinger til Excel uten GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="Konverter alle .xml-filer i en mappe")
+    batch.add_argument("in_dir")
+    batch.add_argument("out_dir")
+    batch.add_argument("--workers", type=int, default=os.cpu_count(), help="Antall prosesser (standard: antall kjerner)")
+    batch.add_argument("--barcodes", action="store_true", help="Ta med strekkoder i Excel-filene")
+    args = parser.parse_args(argv)
+
+    files = sorted(f for f in os.listdir(args.in_dir) if f.lower().endswith(".xml"))
+    if not files:
+        print(f"Ingen .xml-filer i {args.in_dir}")
+        return 1
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        jobs = {
+            pool.submit(
+                batch_convert_file,
+                os.path.join(args.in_dir, f),
+                os.path.join(args.out_dir, os.path.splitext(f)[0] + ".xlsx"),
+                args.barcodes,
+            ): f
+            for f in files
+        }
+        for job in as_completed(jobs):
+            f = jobs[job]
+            try:
+                name, rows, elapsed = job.result()
+                print(f"{f:<40} {name:<36} {rows:>7} rader {elapsed:8.2f} s", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"{f:<40} FEIL: {e}", flush=True)
+
+    print(f"{len(files) - failed}/{len(files)} filer konvertert på {time.perf_counter() - start:.2f} s "
+          f"med {args.workers} prosesser")
+    return 1 if failed else 0
@@ -0,0 +1,227 @@
+# fiks_core/document.py
+# Innlest XML: opprydding av innlimt tekst, gjenkjenning av rot-elementet
+# (sniffing), ParsedDocument og strømmende parsing av varelinjer.
+import io
+import re
+from collections import namedtuple
+
+from utils.lazy_imports import LazyModule
+from utils.tracing import span
+
+etree = LazyModule("lxml.etree")
+
+
+# Sanitize XML input
+def sanitize_input(txt: str) -> str:
+    txt = re.sub(r'(?s)<(style|script)[^>]*>.*?</\1>', '', txt)
+    txt = re.sub(r'<!--.*?-->', '', txt)
+    txt = re.sub(r'<!DOCTYPE[^>]*>', '', txt)
+    txt = re.sub(r'<\?xml[^>]*\?>', '', txt)
+    txt = txt.replace('&nbsp;', ' ').replace('&amp;', '&')
+    txt = re.sub(r'[^\x00-\x7F]+', '', txt)
+    txt = re.sub(r'\n[ 	]*\n+', '\n', txt)
+    return txt.strip()
+
+# Extract unique XML tags
+def get_unique_tags(xml_text: str) -> list[str]:
+    parser = etree.XMLParser(recover=True)
+    root = etree.fromstring(xml_text.encode(), parser=parser)
+    tags = set(re.sub(r'\{.*?\}', '', el.tag).split(':')[-1] for el in root.iter())
+    return sorted(tags)
+
+# Clean-extract XML block
+def extract_clean_xml_block(raw_text: str) -> str:
+    
+    xml_pos = raw_text.find('<?xml')
+    if xml_pos != -1:
+        raw_text = raw_text[xml_pos:]
+
+    start = raw_text.find('<')
+    end = raw_text.rfind('>') + 1
+    if end <= start:
+        raise ValueError('Fant ikke gyldig XML-innhold.')
+
+    cleaned = raw_text[start:end]
+
+    cleaned = re.sub(r'^[\'"]?(<\?xml[^>]*\?>)?', r'\1', cleaned.strip())
+    cleaned = cleaned.strip('\'"')  
+
+    if cleaned.count('<') > 1 and not cleaned.lower().startswith('<root'):
+        cleaned = f"<Root>{cleaned}</Root>"
+
+    return cleaned
+
+
+def local_name(tag) -> str:
+    # "{ns}Tag" / "ns:Tag" -> "Tag" (kommentarer o.l. har ikke str-tag)
+    if not isinstance(tag, str):
+        return ''
+    return tag.rpartition('}')[2].rpartition(':')[2]
+
+
+def _xml_source(source):
+    # iterparse vil ha filnavn eller et fil-lignende objekt
+    if isinstance(source, ParsedDocument):
+        source = source.raw
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, str) and source.lstrip().startswith('<'):
+        return io.BytesIO(source.encode('utf-8'))
+    return source
+
+
+class ProgressReader:
+    """Fil-lignende objekt over bytes som melder hvor langt parseren har lest.
+
+    iterparse leser i biter på 32 KB; progress_func(lest, totalt) kalles per
+    bit. Et unntak fra progress_func (f.eks. JobCancelled) stopper parsingen.
+    """
+    def __init__(self, data: bytes, progress_func):
+        self._buf = io.BytesIO(data)
+        self.total = len(data)
+        self.progress_func = progress_func
+
+    def read(self, size=-1):
+        chunk = self._buf.read(size)
+        self.progress_func(self._buf.tell(), self.total)
+        return chunk
+
+
+# Gjenkjenning leser bare starten av dokumentet, i biter som dobles fra
+# SNIFF_FIRST_CHUNK til SNIFF_CHUNK, og gir opp etter SNIFF_LIMIT uten treff.
+SNIFF_FIRST_CHUNK = 512
+SNIFF_CHUNK = 4096
+SNIFF_LIMIT = 64 * 1024
+
+# text er tom for start-tagger; elementtekst og kommentarer kommer som egne
+# SniffedElement når de er lest (kommentarer med tag '')
+SniffedElement = namedtuple('SniffedElement', 'tag namespace message_type attrib text')
+
+
+def _sniff_chunks(source):
+    size, pos = SNIFF_FIRST_CHUNK, 0
+    while True:
+        if hasattr(source, 'read'):
+            chunk = source.read(size)
+        else:
+            chunk = source[pos:pos + size]
+            pos += size
+        if not chunk:
+            return
+        yield chunk
+        size = min(size * 2, SNIFF_CHUNK)
+
+
+def sniff_elements(source, limit=SNIFF_LIMIT):
+    """Gir start-taggene i dokumentet i rekkefølge, uten å parse resten.
+
+    Events fra en XMLPullParser brukes etter hvert som de kommer, og
+    innmatingen stopper så snart kalleren slutter å spørre – vanligvis
+    etter rot-elementet. Elementer med tekst gis én gang til når
+    slutt-taggen er lest (med text), og kommentarer gis med tag ''.
+    """
+    parser = etree.XMLPullParser(events=("start", "end", "comment"), recover=True)
+    fed = 0
+    for chunk in _sniff_chunks(source):
+        try:
+            parser.feed(chunk)
+        except etree.XMLSyntaxError:
+            return
+        for event, elem in parser.read_events():
+            if event == "comment":
+                yield SniffedElement('', '', '', {}, elem.text or '')
+                continue
+            if not isinstance(elem.tag, str):
+                continue
+            text = ''
+            if event == "end":
+                text = (elem.text or '').strip()
+                if not text:
+                    continue
+            yield SniffedElement(
+                local_name(elem.tag),
+                etree.QName(elem).namespace or '',
+                (elem.get('MessageType') or '').upper(),
+                dict(elem.attrib),
+                text,
+            )
+        fed += len(chunk)
+        if fed >= limit:
+            return
+
+
+class ParsedDocument:
+    """Ett innlimt XML-dokument: rå bytes, parset rot og valgt extractor.
+
+    Gjenkjenning, ekstrahering og forhåndsvisning deler samme objekt, så
+    dokumentet parses høyst én gang per klikk. root, extractor og result
+    regnes ut første gang de brukes.
+    """
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._root = None
+        self._extractor = None
+        self._result = None
+
+    @classmethod
+    def from_text(cls, raw_text: str):
+        with span("extract_clean_xml_block", chars=len(raw_text)):
+            return cls(extract_clean_xml_block(raw_text).encode('utf-8'))
+
+    @property
+    def root(self):
+        if self._root is None:
+            with span("parse_xml", bytes=len(self.raw)):
+                parser = etree.XMLParser(recover=True, huge_tree=True)
+                self._root = etree.fromstring(self.raw, parser=parser)
+        return self._root
+
+    @property
+    def extractor(self):
+        if self._extractor is None:
+            from fiks_core.extractors import detect_extractor
+            with span("detect_extractor"):
+                self._extractor = detect_extractor(self.raw)
+        return self._extractor
+
+    @property
+    def result(self):
+        if self._result is None:
+            extractor = self.extractor
+            with span("extract", extractor=type(extractor).__name__):
+                self._result = extractor.extract(self)
+        return self._result
+
+
+def as_document(xml) -> ParsedDocument:
+    # Extractorene tar imot både ParsedDocument og ren XML-tekst
+    if isinstance(xml, ParsedDocument):
+        return xml
+    if isinstance(xml, str):
+        xml = xml.encode('utf-8')
+    return ParsedDocument(xml)
+
+
+def iterparse_items(source, item_tag="BaseItemDetails", on_end=None):
+    """Strømmer <item_tag>-elementer fra source med lxml.etree.iterparse.
+
+    source kan være XML-tekst, bytes, et filnavn eller et fil-objekt.
+    Hvert element gis ut når slutt-taggen er lest, og ryddes bort (sammen
+    med allerede behandlede søsken) når kalleren ber om neste, slik at
+    minnebruken holder seg flat uansett filstørrelse.
+    on_end(navn, elem) kalles for alle andre ferdig-parsede elementer og
+    brukes til header-felt som OrderNumber og DeliveryNoteNumber.
+    """
+    context = etree.iterparse(
+        _xml_source(source), events=("end",), recover=True, huge_tree=True
+    )
+    for _, elem in context:
+        name = local_name(elem.tag)
+        if name == item_tag:
+            yield elem
+            elem.clear(keep_tail=True)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        elif on_end is not None:
+            on_end(name, elem)
+    del context
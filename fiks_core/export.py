@@ -0,0 +1,149 @@
+# fiks_core/export.py
+# Excel-eksport av et ekstrahert resultat, valgfritt med én strekkode per GTIN.
+# pandas og openpyxl lastes først når eksporten kjøres.
+import logging
+
+from utils.export_helpers import generate_gtin_with_progress
+from utils.tracing import span
+
+export_log = logging.getLogger("fiks.export")
+
+# Bredde (tegn) på strekkodekolonnen, tilpasset bildene på 300 px
+BARCODE_COLUMN_WIDTH = 44
+# Antall rader kolonnebreddene regnes ut fra (None = alle)
+AUTOFIT_SAMPLE_ROWS = None
+
+
+def export_to_excel_flexible(file, result, with_barcodes=False, parent_window=None,
+                             progress_func=None, barcode_dir=None, open_after=True,
+                             barcode_workers=None, autofit_sample_rows=AUTOFIT_SAMPLE_ROWS,
+                             check_cancel=None):
+    import os
+    import platform
+    import pandas as pd
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+    from openpyxl.drawing.image import Image
+
+    if "Products" not in result:
+        raise ValueError("Ingen produkter funnet for eksport.")
+
+    with span("dataframe", rows=len(result["Products"])):
+        df = pd.DataFrame(result["Products"])
+
+    if with_barcodes:
+        if "GTIN" in df.columns:
+            df["GTIN"] = df["GTIN"].astype(str).str.strip()
+        with span("generate_gtin_barcodes"):
+            df = generate_gtin_with_progress(df, progress_func, cache_dir=barcode_dir,
+                                             workers=barcode_workers)
+
+    header_lines = export_header_lines(result)
+    barcode_col = None
+    if with_barcodes and "StrekkodeFil" in df.columns:
+        barcode_col = df.columns.get_loc("StrekkodeFil") + 1
+
+    # Ett gjennomløp med write_only: bredder må settes før første rad skrives,
+    # så de regnes ut fra DataFrame-en og ikke fra cellene etterpå
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    with span("column_widths"):
+        widths = excel_column_widths(df, header_lines, autofit_sample_rows)
+    for col, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    if barcode_col:
+        ws.column_dimensions[get_column_letter(barcode_col)].width = BARCODE_COLUMN_WIDTH
+
+    # Rad 1-3: header-linjer, rad 4: kolonnenavn (samme stil som pandas), rad 5-: data
+    for i in range(3):
+        ws.append([header_lines[i]] if i < len(header_lines) else [])
+    thin = Side(style="thin")
+    header_cells = []
+    for name in df.columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    barcode_letter = get_column_letter(barcode_col) if barcode_col else None
+    with span("write_rows", rows=len(df)):
+        for excel_row, values in enumerate(df.itertuples(index=False, name=None), start=5):
+            if check_cancel and excel_row % 1000 == 0:
+                check_cancel()
+            values = [None if v is None or v != v else v for v in values]  # NaN -> tom celle
+            if barcode_col:
+                img_path = values[barcode_col - 1]
+                if img_path and os.path.exists(img_path):
+                    try:
+                        img = Image(img_path)
+                        img.height = 100
+                        img.width = 300
+                        ws.add_image(img, f"{barcode_letter}{excel_row}")
+                        ws.row_dimensions[excel_row].height = 110
+                    except Exception as e:
+                        export_log.error("Kunne ikke legge inn strekkode %s: %s", img_path, e)
+            ws.append(values)
+
+    if check_cancel:
+        check_cancel()  # siste sjanse før filen skrives
+    with span("save_workbook"):
+        wb.save(file)
+
+    if not open_after:
+        return
+    if platform.system() == "Windows":
+        os.startfile(file)
+    elif platform.system() == "Darwin":
+        os.system(f"open \"{file}\"")
+    else:
+        os.system(f"xdg-open \"{file}\"")
+
+
+def export_header_lines(result):
+    # Tekstlinjene som havner i A1-A3 over tabellen
+    if "OrderNumber" in result:
+        return [
+            f"OrderNumber: {result['OrderNumber']}",
+            f"OrderDate: {result['OrderDate']}",
+        ]
+    if "InvoiceNumber" in result:
+        return [
+            f"InvoiceNumber: {result['InvoiceNumber']}",
+            f"InvoiceDate: {result['InvoiceDate']}",
+            f"Total: {result['Summary']['TotalAmount']}  |  MVA: {result['Summary']['VatAmount']} {result['Summary']['Currency']}",
+        ]
+    return []
+
+
+def excel_column_widths(df, header_lines=(), sample_rows=AUTOFIT_SAMPLE_ROWS):
+    """Kolonnebredder for eksporten, regnet ut kolonnevis fra DataFrame-en.
+
+    Bredden er lengste verdi (eller kolonnenavn) + 2; header-linjene står i
+    kolonne A. Med sample_rows brukes bare de første N radene, noe som holder
+    på svært store ark der de første radene er representative.
+    """
+    data = df if sample_rows is None else df.head(sample_rows)
+    text = data.fillna("").astype(str)
+    widths = []
+    for i, col in enumerate(df.columns):
+        longest = text.iloc[:, i].str.len().max() if len(text) else 0
+        max_length = max(len(str(col)), int(longest) if longest == longest else 0)
+        if i == 0 and header_lines:
+            max_length = max(max_length, max(len(line) for line in header_lines))
+        widths.append(max_length + 2)
+    return widths
+
+
+def result_for_export(result):
+    # ASN-resultatet er gruppert per pakke; eksporten vil ha en flat produktliste
+    if "Packages" not in result:
+        return result
+    return {
+        "Products": [item for group in result["Packages"].values() for item in group],
+        "OrderNumber": next((item.get("BuyersOrderNumber") for group in result["Packages"].values() for item in group if item.get("BuyersOrderNumber")), ""),
+        "OrderDate": "",  # Kan legges til senere om ønskelig
+    }
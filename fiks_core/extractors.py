@@ -0,0 +1,460 @@
+# fiks_core/extractors.py
+# Extractorene per meldingstype og registeret detect_extractor velger fra.
+# Nye typer legges til med register_extractor(navn, match, klasse).
+import logging
+import re
+
+from fiks_core.document import as_document, iterparse_items, local_name, sniff_elements
+from fiks_core.formatting import clean_gtin
+from utils.lazy_imports import LazyModule
+from utils.xpath_cache import compiled, find_all, find_text, find_code_text
+
+etree = LazyModule("lxml.etree")
+extract_log = logging.getLogger("fiks.extract")
+
+
+# Extractor Registry
+EXTRACTOR_REGISTRY = {}
+
+def register_extractor(name, match_fn, extractor_class):
+    EXTRACTOR_REGISTRY[name] = {
+        'match': match_fn,
+        'class': extractor_class
+    }
+
+
+def detect_extractor(xml_text):
+    # Første element som en registrert extractor kjenner igjen, avgjør typen
+    for elem in sniff_elements(xml_text):
+        for name, entry in EXTRACTOR_REGISTRY.items():
+            if entry['match'](elem):
+                return entry['class']()
+    raise ValueError("Ukjent XML-type. Kan ikke velge riktig extractor.")
+
+
+# SmartXMLExtractor
+class SmartXMLExtractor:
+    # rå tag ("{ns}Description") -> lokalt navn i små bokstaver, delt mellom instanser
+    _local_names = {}
+
+    def __init__(self, parent_tag, child_tags, deep=True):
+        self.parent_tag = parent_tag.lower()
+        self.child_tags = [t.lower() for t in child_tags]
+        self.deep = deep
+        self.tag_fields = {t: t.upper() for t in self.child_tags}
+        self.code_fields = {t.upper(): t.upper() for t in self.child_tags}
+    def strip_ns(self, tag:str): return re.sub(r'\{.*?\}','', tag).split(':')[-1].lower()
+    def walk_element(self, elem, tag_fields, code_fields):
+        """Fyller alle felt i ett enkelt besøk av elem sitt subtre.
+
+        tag_fields: {lokalt tagnavn (små bokstaver): nøkkel}
+        code_fields: {Code-verdi: nøkkel} for AdditionalProductId-blokker,
+        f.eks. Code=GTIN -> Text. Som i find_code_text må Code stå direkte
+        under AdditionalProductId og være nøyaktig lik (store/små bokstaver).
+        Første forekomst vinner, og en tag går foran et Code/Text-par.
+        """
+        res, codes = {}, {}
+        names = self._local_names
+        for sub in (elem.iter() if self.deep else elem):
+            t = self._local(sub.tag, names)
+            key = tag_fields.get(t)
+            if key is not None and key not in res:
+                res[key] = (sub.text or '').strip()
+            if t == 'additionalproductid' and code_fields:
+                code_keys, text = [], None
+                for child in sub:
+                    ct = self._local(child.tag, names)
+                    if ct == 'code':
+                        code_keys.append(code_fields.get(child.text or ''))
+                    elif ct == 'text' and text is None:
+                        text = (child.text or '').strip()
+                if text is not None:
+                    for key in code_keys:
+                        if key is not None and key not in codes:
+                            codes[key] = text
+        for key, val in codes.items():
+            if key not in res: res[key]=val
+        return res
+    def _local(self, tag, names):
+        t = names.get(tag)
+        if t is None:
+            t = names[tag] = self.strip_ns(tag) if isinstance(tag, str) else ''
+        return t
+    def extract_from_element(self, elem):
+        return self.walk_element(elem, self.tag_fields, self.code_fields)
+    def extract(self, xml_text) -> list[dict]:
+        root=as_document(xml_text).root
+        elems=[e for e in root.iter() if self.strip_ns(e.tag)==self.parent_tag]
+        if not elems: raise ValueError(f"Ingen '{self.parent_tag}'-blokker funnet.")
+        return [self.extract_from_element(e) for e in elems]
+
+
+class OpenPurchaseOrderToAzureExtractor:
+    def extract(self, xml_string):
+        root = as_document(xml_string).root
+
+        order_number = self._safe_find_text_xpath(root, ".//*[local-name()='OrderNumber']")
+        order_date = self._find_ref_value_xpath(root, "ORDER_DATE")
+
+        products = [self._item_row(item) for item in find_all(root, "BaseItemDetails")]
+
+        return {
+            "OrderNumber": order_number,
+            "OrderDate": order_date,
+            "Products": products
+        }
+
+    def iter_products(self, source, header=None):
+        # Strømmende variant av extract(): gir én rad per BaseItemDetails.
+        # header (dict) fylles med OrderNumber/OrderDate underveis.
+        if header is None:
+            header = {}
+        header.setdefault("OrderNumber", "")
+        header.setdefault("OrderDate", "")
+
+        def on_end(name, elem):
+            if name == "OrderNumber" and not header["OrderNumber"]:
+                header["OrderNumber"] = (elem.text or "").strip()
+            elif name == "Ref" and not header["OrderDate"]:
+                header["OrderDate"] = self._find_ref_value_xpath(elem, "ORDER_DATE", include_self=True)
+
+        for item in iterparse_items(source, on_end=on_end):
+            yield self._item_row(item)
+
+    def extract_stream(self, source):
+        header = {}
+        products = list(self.iter_products(source, header))
+        return self.result_from(header, products)
+
+    def result_from(self, header, products):
+        # Samme form som extract(); products er radene fra iter_products
+        return {
+            "OrderNumber": header["OrderNumber"],
+            "OrderDate": header["OrderDate"],
+            "Products": products
+        }
+
+    def _safe_find_text_xpath(self, ctx, path):
+        node = compiled(path)(ctx)
+        if node and isinstance(node[0], etree._Element) and node[0].text:
+            return node[0].text.strip()
+        return ""
+
+    def _item_row(self, item):
+        rema_id = self._safe_find_text_xpath(item, ".//*[local-name()='BuyersProductId']")
+        row = {
+            "Varenavn": self._safe_find_text_xpath(item, ".//*[local-name()='Description']"),
+            "REMAid": rema_id,
+            "Quantity": self._safe_find_text_xpath(item, ".//*[local-name()='QuantityOrdered']"),
+        }
+
+        for ref in compiled(".//*[local-name()='ProductIdentification']//*[local-name()='AdditionalProductId']")(item):
+            code = self._safe_find_text_xpath(ref, ".//*[local-name()='Code']").upper()
+            text = self._safe_find_text_xpath(ref, ".//*[local-name()='Text']")
+            if not code or not text:
+                continue
+            if code.startswith("GTIN"):
+                text = clean_gtin(text)
+            row[code] = text
+
+        return row
+
+    def _find_ref_value_xpath(self, root, code_name, include_self=False):
+        refs = find_all(root, "Ref")
+        if include_self:
+            refs.insert(0, root)
+        for ref in refs:
+            code_node = find_all(ref, "Code")
+            if code_node and code_node[0].text == code_name:
+                return find_text(ref, "Text")
+        return ""
+
+class AdvancedShippingNoteExtractor:
+    def extract(self, xml_string):
+        import random
+        root = as_document(xml_string).root
+
+        delivery_note_number = self._find(root, ".//*[local-name()='DeliveryNoteNumber']")
+        packages = {}
+
+        for delivery_details in find_all(root, "DeliveryNoteDetails"):
+            ident = self._find(delivery_details, ".//*[local-name()='ParcelIdentification']/*[local-name()='IdentFrom']")
+            if not ident:
+                ident = f"UkjentSSCC-{random.randint(1000,9999)}"
+
+            if ident not in packages:
+                packages[ident] = []
+
+            for item in find_all(delivery_details, "BaseItemDetails"):
+                packages[ident].append(self._item_row(item))
+
+        return {
+            "DeliveryNoteNumber": delivery_note_number,
+            "Packages": packages
+        }
+
+    def iter_products(self, source, header=None):
+        # Strømmende variant av extract(): gir (SSCC, rad) per BaseItemDetails.
+        # Radene holdes igjen til DeliveryNoteDetails slutter, siden
+        # ParcelIdentification kan stå etter varelinjene; minnet er én pakke.
+        # header (dict) fylles med DeliveryNoteNumber og SSCC (alle pakkene i
+        # dokumentrekkefølge, også de uten varelinjer).
+        import random
+        if header is None:
+            header = {}
+        header.setdefault("DeliveryNoteNumber", "")
+        header.setdefault("SSCC", [])
+        state = {"ident": "", "rows": []}
+        ready = []
+
+        def on_end(name, elem):
+            if name == "DeliveryNoteNumber" and not header["DeliveryNoteNumber"]:
+                header["DeliveryNoteNumber"] = (elem.text or "").strip()
+            elif name == "IdentFrom" and not state["ident"]:
+                parent = elem.getparent()
+                if parent is not None and local_name(parent.tag) == "ParcelIdentification":
+                    state["ident"] = (elem.text or "").strip()
+            elif name == "DeliveryNoteDetails":
+                ident = state["ident"] or f"UkjentSSCC-{random.randint(1000,9999)}"
+                header["SSCC"].append(ident)
+                ready.extend((ident, row) for row in state["rows"])
+                state["ident"], state["rows"] = "", []
+                # Ny pakke starter etter denne – rydd bort den ferdige
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+        def drain():
+            done = ready[:]
+            del ready[:]
+            return done
+
+        for item in iterparse_items(source, on_end=on_end):
+            yield from drain()
+            state["rows"].append(self._item_row(item))
+        # Varelinjer utenfor DeliveryNoteDetails tas ikke med, som i extract()
+        yield from drain()
+
+    def extract_stream(self, source):
+        header = {}
+        products = self.iter_products(source, header)
+        return self.result_from(header, products)
+
+    def result_from(self, header, products):
+        # products er (SSCC, rad)-parene fra iter_products; pakker uten
+        # varelinjer kommer fra header["SSCC"]
+        products = list(products)
+        packages = {ident: [] for ident in header.get("SSCC", ())}
+        for ident, row in products:
+            packages.setdefault(ident, []).append(row)
+        return {
+            "DeliveryNoteNumber": header["DeliveryNoteNumber"],
+            "Packages": packages
+        }
+
+    def _item_row(self, item):
+        desc = self._find(item, ".//*[local-name()='Description']")
+        rema_id = self._find(item, ".//*[local-name()='BuyersProductId']")
+        quantity_val = self._find(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='Quantity']")
+        quantity_unit = self._find(item, ".//*[local-name()='DeliveredQuantity']/*[local-name()='QuantityUnit']")
+        if quantity_val and quantity_unit:
+            quantity_str = f"{quantity_val} {quantity_unit}".strip()
+        else:
+            quantity_str = quantity_val or ""  # fallback
+
+        buyers_order_number = self._find(item, ".//*[local-name()='BuyersOrderInfo']/*[local-name()='OrderNumber']")
+
+        # GTIN-henting
+        gtin = clean_gtin(find_code_text(item, "GTIN"))
+
+        # EPD-henting
+        epd = find_code_text(item, "EPD")
+
+        return {
+            "Varenavn": desc,
+            "GTIN": gtin,
+            "EPD": epd,
+            "REMAid": rema_id,
+            "BuyersOrderNumber": buyers_order_number,
+            "Quantity": quantity_str
+        }
+
+    def _find(self, ctx, path):
+        res = compiled(path)(ctx)
+        return res[0].text.strip() if res and res[0].text else ""
+
+
+class InvoiceToGoldExtractor(SmartXMLExtractor):
+    def __init__(self):
+        super().__init__(
+            parent_tag="BaseItemDetails",
+            child_tags=[
+                "Description",
+                "GTIN",
+                "EPD",
+                "UnitPrice",
+                "LineItemAmount",
+                "VatAmount",
+                "QuantityInvoiced",
+            ],
+            deep=True
+        )
+
+    # Kolonner per varelinje, i rekkefølgen de vises og eksporteres
+    ITEM_COLUMNS = ["Varenavn", "GTIN", "EPD", "UnitPrice", "LineItemAmount", "VatAmount", "QuantityInvoiced"]
+    ITEM_FIELDS = {
+        "description": "Varenavn",
+        "unitprice": "UnitPrice",
+        "lineitemamount": "LineItemAmount",
+        "vatamount": "VatAmount",
+        "quantityinvoiced": "QuantityInvoiced",
+    }
+    ITEM_CODES = {"GTIN": "GTIN", "EPD": "EPD"}
+
+    # Header-felt som hentes fra første forekomst i dokumentet
+    SUMMARY_TAGS = {
+        "InvoiceNumber": "InvoiceNumber",
+        "InvoiceDate": "InvoiceDate",
+        "LineItemTotalsAmount": "TotalAmount",
+        "VatAmount": "VatAmount",
+        "Currency": "Currency",
+    }
+
+    def extract(self, xml_text):
+        extract_log.debug("Starter InvoiceToGoldExtractor.extract()")
+
+        try:
+            root = as_document(xml_text).root
+        except Exception as e:
+            extract_log.error("Kunne ikke parse XML: %s", e)
+            return {
+                "InvoiceNumber": "",
+                "InvoiceDate": "",
+                "Products": [],
+                "Summary": {}
+            }
+
+        items = find_all(root, "BaseItemDetails")
+        extract_log.debug("Antall <BaseItemDetails>-elementer funnet: %d", len(items))
+
+        products = []
+        safe_find = self._safe_find
+        # Sjekkes én gang: på standardnivået formateres ingenting per rad
+        debug = extract_log.isEnabledFor(logging.DEBUG)
+
+        for idx, item in enumerate(items):
+            try:
+                products.append(self._item_row(item))
+                if debug:
+                    extract_log.debug("Produkt %d: %s", idx + 1, products[-1])
+            except Exception as e:
+                extract_log.error("Feil ved produkt %d: %s", idx + 1, e)
+
+        # Metadata
+        invoice_number = safe_find(root, ".//*[local-name()='InvoiceNumber']")
+        invoice_date = safe_find(root, ".//*[local-name()='InvoiceDate']")
+        total_amount = safe_find(root, ".//*[local-name()='LineItemTotalsAmount']")
+        vat_amount = safe_find(root, ".//*[local-name()='VatAmount']")
+        currency = safe_find(root, ".//*[local-name()='Currency']")
+
+        extract_log.info("Hentet %d produkter. Fakturanr: %s, Dato: %s", len(products), invoice_number, invoice_date)
+
+        return {
+            "InvoiceNumber": invoice_number,
+            "InvoiceDate": invoice_date,
+            "Products": products,
+            "Summary": {
+                "TotalAmount": total_amount,
+                "VatAmount": vat_amount,
+                "Currency": currency
+            }
+        }
+
+    def iter_products(self, source, header=None):
+        # Strømmende variant av extract(): gir én rad per BaseItemDetails.
+        # header (dict) fylles med fakturanr, dato og summeringsfelt underveis.
+        if header is None:
+            header = {}
+        for key in self.SUMMARY_TAGS.values():
+            header.setdefault(key, "")
+
+        def on_end(name, elem):
+            key = self.SUMMARY_TAGS.get(name)
+            if key and not header[key] and elem.text:
+                header[key] = elem.text.strip()
+
+        for idx, item in enumerate(iterparse_items(source, on_end=on_end)):
+            try:
+                yield self._item_row(item)
+            except Exception as e:
+                extract_log.error("Feil ved produkt %d: %s", idx + 1, e)
+
+    def extract_stream(self, source):
+        header = {}
+        try:
+            products = list(self.iter_products(source, header))
+        except etree.LxmlError as e:
+            extract_log.error("Kunne ikke parse XML: %s", e)
+            return {
+                "InvoiceNumber": "",
+                "InvoiceDate": "",
+                "Products": [],
+                "Summary": {}
+            }
+        return self.result_from(header, products)
+
+    def result_from(self, header, products):
+        # Samme form som extract(); products er radene fra iter_products
+        return {
+            "InvoiceNumber": header["InvoiceNumber"],
+            "InvoiceDate": header["InvoiceDate"],
+            "Products": products,
+            "Summary": {
+                "TotalAmount": header["TotalAmount"],
+                "VatAmount": header["VatAmount"],
+                "Currency": header["Currency"]
+            }
+        }
+
+    def _safe_find(self, context, path):
+        try:
+            res = compiled(path)(context)
+            return res[0].text.strip() if res and res[0].text else ""
+        except Exception as e:
+            extract_log.warning("XPath-feil på path '%s': %s", path, e)
+            return ""
+
+    def _item_row(self, item):
+        # Ett besøk av varelinjen fyller alle kolonnene (se SmartXMLExtractor.walk_element)
+        found = self.walk_element(item, self.ITEM_FIELDS, self.ITEM_CODES)
+        row = {key: found.get(key, "") for key in self.ITEM_COLUMNS}
+        row["GTIN"] = clean_gtin(row["GTIN"])
+        return row
+
+
+# EXTRACTOR REGISTRERING
+# Match-funksjonene får ett SniffedElement om gangen (rot-elementet først);
+# tagnavn sammenlignes uten hensyn til store/små bokstaver
+register_extractor(
+    "ASN",
+    lambda el: el.message_type == "DESADV" or el.tag.lower() in ("deliverynote", "deliverynotedetails"),
+    AdvancedShippingNoteExtractor
+)
+
+register_extractor(
+    "InvoiceToGold",
+    lambda el: el.message_type == "INVOIC" or el.tag.lower() in ("invoice", "invoicenumber"),
+    InvoiceToGoldExtractor
+)
+
+register_extractor(
+    "POtoAzure",
+    lambda el: el.message_type == "ORDERS" or el.tag.lower() == "order"
+        or any("open purchase order to azure" in v.lower() for v in (el.text, *el.attrib.values())),
+    OpenPurchaseOrderToAzureExtractor
+)
+
+
+# 🔜 Placeholder: Register new extractors as needed
+# register_extractor("RETURN", lambda el: el.message_type == "RETANN" or el.tag.lower() == "returnnote",
+#                    ReturnNoteExtractor)
@@ -0,0 +1,17 @@
+# fiks_core/formatting.py
+# Verdier slik de vises og eksporteres: GTIN som 13 sifre og beløp i NOK.
+import re
+
+
+def format_nok(value):
+    try:
+        f = float(value)
+        return f"kr {f:,.2f}".replace(",", " ").replace(".", ",")
+    except:
+        return value
+    
+def clean_gtin(gtin):
+    s = re.sub(r'\D', '', str(gtin))  # Keep only digits
+    if len(s) > 13 and s[0] in ("0", "1", "2", "3"):
+        s = s[1:]
+    return s
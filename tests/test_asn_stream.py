@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("lxml")
+
+from fiks_core import AdvancedShippingNoteExtractor
+
+ITEM = """<BaseItemDetails>
+  <Description>{name}</Description>
+  <BuyersProductId>{rema}</BuyersProductId>
+  <DeliveredQuantity><Quantity>1</Quantity><QuantityUnit>STK</QuantityUnit></DeliveredQuantity>
+</BaseItemDetails>"""
+
+ASN = f"""<DeliveryNote MessageType="DESADV">
+  <DeliveryNoteHeader><DeliveryNoteNumber>DN-1</DeliveryNoteNumber></DeliveryNoteHeader>
+  <DeliveryNoteDetails>
+    <ParcelIdentification><IdentFrom>370000000000000001</IdentFrom></ParcelIdentification>
+    {ITEM.format(name="Melk", rema="1")}
+  </DeliveryNoteDetails>
+  <DeliveryNoteDetails>
+    {ITEM.format(name="Brød", rema="2")}
+    {ITEM.format(name="Ost", rema="3")}
+    <ParcelIdentification><IdentFrom>370000000000000002</IdentFrom></ParcelIdentification>
+  </DeliveryNoteDetails>
+  <DeliveryNoteDetails>
+    <ParcelIdentification><IdentFrom>370000000000000003</IdentFrom></ParcelIdentification>
+  </DeliveryNoteDetails>
+</DeliveryNote>"""
+
+
+def varenavn(result):
+    return {ident: [row["Varenavn"] for row in rows] for ident, rows in result["Packages"].items()}
+
+
+def test_stream_matches_dom_when_ident_follows_lines():
+    extractor = AdvancedShippingNoteExtractor()
+    expected = {
+        "370000000000000001": ["Melk"],
+        "370000000000000002": ["Brød", "Ost"],
+        "370000000000000003": [],
+    }
+    dom = extractor.extract(ASN)
+    stream = extractor.extract_stream(ASN.encode("utf-8"))
+
+    assert varenavn(dom) == expected
+    assert varenavn(stream) == expected
+    assert list(stream["Packages"]) == list(dom["Packages"])
+    assert stream["DeliveryNoteNumber"] == dom["DeliveryNoteNumber"] == "DN-1"
+
+
+def test_iter_products_records_every_package_in_header():
+    header = {}
+    products = list(AdvancedShippingNoteExtractor().iter_products(ASN.encode("utf-8"), header))
+
+    assert [ident for ident, _ in products] == [
+        "370000000000000001", "370000000000000002", "370000000000000002",
+    ]
+    assert header["SSCC"] == ["370000000000000001", "370000000000000002", "370000000000000003"]
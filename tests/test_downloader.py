@@ -0,0 +1,105 @@
+import hashlib
+import os
+import re
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from utils import downloader
+from utils.downloader import DownloadError, download_file
+
+PAYLOAD = bytes(range(256)) * 1024
+SHA = hashlib.sha256(PAYLOAD).hexdigest()
+ETAG = '"installer-1"'
+DROP_AT = 2 * downloader.CHUNK_SIZE  # hele bolker, så .part ender akkurat her
+
+
+def file_handler(drop_first_at=None):
+    # Serverer PAYLOAD med ETag, Range og If-Range. drop_first_at lukker
+    # forbindelsen etter så mange bytes i første svar.
+    class Handler(BaseHTTPRequestHandler):
+        requests = []
+
+        def do_GET(self):
+            rng, if_range = self.headers.get("Range"), self.headers.get("If-Range")
+            self.requests.append((rng, if_range))
+            m = re.match(r"bytes=(\d+)-$", rng or "")
+            start = int(m.group(1)) if m and if_range in (None, ETAG) else 0
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAYLOAD[start:]
+            self.send_response(206 if start else 200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(body)))
+            if start:
+                self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+            self.end_headers()
+            if drop_first_at and len(self.requests) == 1:
+                self.wfile.write(body[:drop_first_at])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(downloader.time, "sleep", lambda s: None)
+
+
+def test_resumes_after_dropped_connection(serve, tmp_path):
+    handler = file_handler(drop_first_at=DROP_AT)
+    dest = str(tmp_path / "setup.exe")
+
+    assert download_file(serve(handler) + "/setup.exe", dest, expected_sha256=SHA) == dest
+
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert handler.requests == [(None, None), (f"bytes={DROP_AT}-", ETAG)]
+    assert not os.path.exists(dest + ".part")
+    assert not os.path.exists(dest + ".part.meta")
+
+
+def test_sha_mismatch_raises_and_removes_part(serve, tmp_path):
+    handler = file_handler(drop_first_at=DROP_AT)
+    dest = str(tmp_path / "setup.exe")
+
+    with pytest.raises(DownloadError, match="SHA-256"):
+        download_file(serve(handler) + "/setup.exe", dest, expected_sha256="0" * 64)
+
+    assert len(handler.requests) == 2
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+    assert not os.path.exists(dest + ".part.meta")
+
+
+@pytest.mark.parametrize("part, validator, first_request", [
+    (PAYLOAD + b"junk", ETAG, (f"bytes={len(PAYLOAD) + 4}-", ETAG)),        # 416
+    (b"old release", '"installer-0"', ("bytes=11-", '"installer-0"')),       # ETag endret
+    (b"old release", None, (None, None)),                                    # ingen validator
+])
+def test_stale_part_is_discarded(serve, tmp_path, part, validator, first_request):
+    handler = file_handler()
+    dest = str(tmp_path / "setup.exe")
+    with open(dest + ".part", "wb") as f:
+        f.write(part)
+    if validator:
+        with open(dest + ".part.meta", "w", encoding="utf-8") as f:
+            f.write(validator)
+
+    download_file(serve(handler) + "/setup.exe", dest, expected_sha256=SHA)
+
+    with open(dest, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert handler.requests[0] == first_request
+    assert handler.requests[-1] in ((None, None), first_request)
+    assert not os.path.exists(dest + ".part")
@@ -0,0 +1,68 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+from utils.update_check import fetch_latest_release, newer_installer, version_tuple
+
+RELEASE = {
+    "tag_name": "v1.10",
+    "assets": [{"name": "FIKS_Tools_1.10.exe",
+                "browser_download_url": "http://example.invalid/FIKS_Tools_1.10.exe"}],
+}
+ETAG = '"rel-1.10"'
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = json.dumps(RELEASE).encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_cached_release_within_interval_makes_no_request(serve, tmp_path):
+    ReleaseHandler.requests = []
+    url = serve(ReleaseHandler)
+    state = str(tmp_path / "update_check.json")
+
+    first = fetch_latest_release("org/repo", api_url=url, state_path=state)
+    second = fetch_latest_release("org/repo", api_url=url, state_path=state)
+
+    assert first == second
+    assert first["tag_name"] == "v1.10"
+    assert ReleaseHandler.requests == [("/repos/org/repo/releases/latest", None)]
+
+
+def test_conditional_request_reuses_cached_release_on_304(serve, tmp_path):
+    ReleaseHandler.requests = []
+    url = serve(ReleaseHandler)
+    state = str(tmp_path / "update_check.json")
+
+    first = fetch_latest_release("org/repo", api_url=url, state_path=state)
+    again = fetch_latest_release("org/repo", api_url=url, state_path=state, interval_hours=0)
+
+    assert again == first
+    assert [etag for _, etag in ReleaseHandler.requests] == [None, ETAG]
+    with open(state, encoding="utf-8") as f:
+        assert json.load(f)["etag"] == ETAG
+
+
+def test_version_comparison_is_numeric():
+    assert version_tuple("1.10") > version_tuple("1.9")
+    assert version_tuple("v1.2") == (1, 2)
+    assert newer_installer(RELEASE, "1.9")[0] == "1.10"
+    assert newer_installer(RELEASE, "1.10") is None
+    assert newer_installer({**RELEASE, "tag_name": "v1.9"}, "1.10") is None
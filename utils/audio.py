@@ -0,0 +1,112 @@
+# utils/audio.py
+# Bakgrunnsmusikk med én fast lydtråd. GUI-et setter bare ønsket tilstand
+# (spor, volum, dempet); tråden importerer pygame og starter mixeren først
+# når noe faktisk skal spilles, så en dempet app aldri rører lydsystemet.
+# Sporene strømmes av pygame.mixer.music direkte fra fil, så komprimerte
+# .ogg/.mp3 brukes foran .wav når de finnes.
+import logging
+import os
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+COMPRESSED_FORMATS = (".ogg", ".mp3")
+
+
+def track_path(path):
+    # "assets/ChipREMA1.wav" -> "assets/ChipREMA1.ogg" hvis den finnes
+    stem = os.path.splitext(path)[0]
+    for ext in COMPRESSED_FORMATS:
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return path
+
+
+class AudioPlayer:
+    def __init__(self, tracks, track, volume=0.5, muted=False, on_error=None):
+        self.tracks = tracks
+        self.track = track
+        self.volume = volume
+        self.muted = muted
+        # on_error(spor, feil) kalles fra lydtråden
+        self.on_error = on_error or (lambda track, e: log.error("Kunne ikke spille %s: %s", track, e))
+        self._wake = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def play(self, track):
+        self.track = track
+        self._notify(start=True)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self._notify()
+
+    def set_muted(self, muted):
+        self.muted = muted
+        self._notify(start=True)
+
+    def stop(self, timeout=1.0):
+        # Ber lydtråden stoppe musikken og avslutte (kalles når appen lukkes);
+        # venter litt, ellers dør daemon-tråden før mixeren er lukket
+        if self._thread:
+            self._wake.put(None)
+            self._thread.join(timeout)
+
+    def _notify(self, start=False):
+        # Lydtråden startes av play()/unmute første gang lyden er på;
+        # før det lagres endringene bare
+        with self._lock:
+            if self._thread is None:
+                if not start or self.muted:
+                    return
+                self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+                self._thread.start()
+        self._wake.put(True)
+
+    def _run(self):
+        import pygame
+
+        loaded = None   # sporet som er lastet i mixeren
+        paused = False
+        while True:
+            stop = self._wake.get() is None
+            # Flere endringer i kø (f.eks. et helt volum-drag) gir én oppdatering
+            try:
+                while not stop:
+                    stop = self._wake.get_nowait() is None
+            except queue.Empty:
+                pass
+            if stop:
+                break
+
+            track, volume, muted = self.track, self.volume, self.muted
+            try:
+                if loaded is None:
+                    if muted:
+                        continue
+                    pygame.mixer.init()
+                if track != loaded:
+                    if muted:
+                        # Byttes først når lyden slås på igjen
+                        pygame.mixer.music.stop()
+                        loaded, paused = None, False
+                        continue
+                    pygame.mixer.music.load(track_path(self.tracks[track]))
+                    pygame.mixer.music.play(-1)
+                    loaded, paused = track, False
+                pygame.mixer.music.set_volume(volume)
+                if muted and not paused:
+                    pygame.mixer.music.pause()
+                elif not muted and paused:
+                    pygame.mixer.music.unpause()
+                paused = muted
+            except Exception as e:
+                self.on_error(track, e)
+                loaded, paused = None, False
+
+        # stop(): musikken og mixeren slås av før tråden avslutter
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+            pygame.mixer.quit()
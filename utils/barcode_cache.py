@@ -0,0 +1,102 @@
+# utils/barcode_cache.py
+# Innholdsadressert cache for strekkodebilder på disk.
+# Nøkkelen er (symbologi, kode, writer-opsjoner, font), så samme vare gir
+# samme fil uansett hvilken rad eller eksport den kommer fra. Treff
+# "touches" (mtime), og evict() sletter de eldste filene til cachen er
+# under MAX_CACHE_BYTES.
+import hashlib
+import io
+import json
+import os
+import threading
+
+from utils.paths import user_cache_dir
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    return user_cache_dir("barcodes")
+
+
+def cache_key(code, symbology="ean13", writer_options=None) -> str:
+    options = dict(writer_options or {})
+    font_path = options.pop("font_path", None)
+    font = None
+    if font_path:
+        # Samme filnavn med annet innhold skal gi ny nøkkel
+        try:
+            font = [os.path.basename(font_path), os.path.getsize(font_path)]
+        except OSError:
+            font = [os.path.basename(font_path), None]
+    raw = json.dumps([symbology, code, sorted(options.items()), font], default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_barcode(code, symbology="ean13", writer_options=None, cache_dir=None) -> str:
+    """Returnerer stien til en PNG for koden, og tegner den bare ved bom."""
+    cache_dir = cache_dir or default_cache_dir()
+    key = cache_key(code, symbology, writer_options)
+    path = os.path.join(cache_dir, key[:2], key + ".png")
+    if os.path.exists(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    # python-barcode/PIL lastes først når noe faktisk må tegnes
+    from barcode import get as get_barcode
+    from barcode.writer import ImageWriter
+
+    writer = ImageWriter()
+    options = dict(writer_options or {})
+    if "font_path" in options:
+        writer.font_path = options.pop("font_path")
+    buf = io.BytesIO()
+    get_barcode(symbology, code, writer=writer).write(buf, options=options)
+
+    # Skriv til en midlertidig fil og bytt navn, så parallelle prosesser
+    # aldri ser en halvskrevet PNG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf.getvalue())
+    os.replace(tmp, path)
+    return path
+
+
+def evict(cache_dir=None, max_bytes=MAX_CACHE_BYTES, keep_since=None):
+    """Sletter minst nylig brukte filer til cachen er under max_bytes.
+
+    Filer brukt etter keep_since (tidsstempel) beholdes, så en eksport
+    aldri mister bilder den nettopp har slått opp.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(cache_dir):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep_since is not None and mtime >= keep_since:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
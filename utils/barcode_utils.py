@@ -1,19 +1,78 @@
+import logging
 import os
-from barcode import get as get_barcode
-from barcode.writer import ImageWriter
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from utils.barcode_cache import cached_barcode, evict
 
-def generate_gtin_barcodes(df, output_folder="barcodes"):
-    os.makedirs(output_folder, exist_ok=True)
-    df["StrekkodeFil"] = ""
+log = logging.getLogger(__name__)
 
-    for idx, row in df.iterrows():
-        gtin = row.get("GTIN", "")
-        if gtin and gtin.isdigit() and len(gtin) == 13:
+
+def gtin_column(df):
+    # GTIN-kolonnen som trimmede strenger ("" der den mangler)
+    if "GTIN" not in df.columns:
+        return pd.Series("", index=df.index)
+    return df["GTIN"].fillna("").astype(str).str.strip()
+
+
+def valid_gtin_mask(gtins):
+    # Kolonnevis sjekk: nøyaktig 13 sifre
+    return gtins.str.fullmatch(r"\d{13}")
+
+
+def render_gtin_barcodes(gtins, cache_dir=None):
+    # Slår opp (eller tegner) én EAN-13-PNG per GTIN i cachen og returnerer {gtin: filsti}
+    paths = {}
+    for gtin in gtins:
+        try:
+            paths[gtin] = cached_barcode(gtin, "ean13", cache_dir=cache_dir)
+        except Exception as ex:
+            log.warning("Strekkodefeil for %s: %s", gtin, ex)
+    return paths
+
+
+def generate_gtin_barcodes(df, cache_dir=None, progress_func=None, chunk_size=200, workers=None):
+    """Legger til StrekkodeFil-kolonnen med én PNG per gyldig GTIN.
+
+    Tegningen er CPU-bundet PIL-arbeid, så med workers > 1 (standard: antall
+    kjerner) fordeles bolker av unike GTIN-er på en prosesspool. workers=1
+    tegner alt i kallerens prosess. Bildene hentes fra / lagres i
+    strekkode-cachen (se utils.barcode_cache), som ryddes etterpå.
+    """
+    started = time.time()
+    gtins = gtin_column(df)
+    unique = gtins[valid_gtin_mask(gtins)].unique()
+    chunks = [unique[start:start + chunk_size] for start in range(0, len(unique), chunk_size)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+
+    # Hver unike, gyldige GTIN tegnes én gang; fremdrift meldes per bolk
+    paths = {}
+    done = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {pool.submit(render_gtin_barcodes, chunk, cache_dir): len(chunk) for chunk in chunks}
             try:
-                path = os.path.join(output_folder, f"gtin_{idx}")
-                ean = get_barcode('ean13', gtin, writer=ImageWriter())
-                img_path = ean.save(path)
-                df.at[idx, "StrekkodeFil"] = img_path
-            except Exception as ex:
-                print(f"Strekkodefeil for {gtin}: {ex}")
+                for job in as_completed(jobs):
+                    paths.update(job.result())
+                    done += jobs[job]
+                    if progress_func:
+                        progress_func(int(done / len(unique) * 100))
+            except BaseException:
+                # progress_func kan avbryte jobben; ikke vent på bolkene som gjenstår
+                pool.shutdown(cancel_futures=True)
+                raise
+    else:
+        for chunk in chunks:
+            paths.update(render_gtin_barcodes(chunk, cache_dir))
+            done += len(chunk)
+            if progress_func:
+                progress_func(int(done / len(unique) * 100))
+    if progress_func and not chunks:
+        progress_func(100)
+
+    evict(cache_dir, keep_since=started)
+
+    df["StrekkodeFil"] = gtins.map(paths).fillna("")
     return df
@@ -0,0 +1,129 @@
+# utils/downloader.py
+# Strømmende nedlasting til en .part-fil ved siden av målfilen.
+# Brudd i forbindelsen gjenopptas med HTTP Range fra der vi slapp, og
+# filen flyttes først på plass når SHA-256 stemmer med den publiserte.
+# ETag/Last-Modified for .part-filen lagres i part + ".meta" og sendes som
+# If-Range, så en endret fil på serveren gir en hel ny nedlasting i stedet
+# for en skjøt av to versjoner.
+import hashlib
+import logging
+import os
+import re
+import time
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(Exception):
+    pass
+
+
+def sha256_of(path, chunk_size=CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _total_size(response, start):
+    # Total filstørrelse fra Content-Range (206) eller Content-Length (200)
+    m = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if m and m.group(3) != "*":
+        return int(m.group(3))
+    length = response.headers.get("Content-Length")
+    return start + int(length) if length else None
+
+
+def _validator(response):
+    # Sterk ETag, ellers Last-Modified (svake ETag-er kan ikke brukes i If-Range)
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _read_validator(meta):
+    try:
+        with open(meta, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _discard(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def download_file(url, dest, expected_sha256=None, progress_func=None,
+                  retries=5, timeout=15, chunk_size=CHUNK_SIZE, session=None):
+    """Laster ned url til dest og returnerer dest.
+
+    progress_func(mottatt, totalt) kalles per bolk (totalt kan være None).
+    En påbegynt dest + ".part" fra en tidligere kjøring gjenopptas også,
+    men bare når vi har en validator å sende som If-Range; ellers, og ved
+    416, kastes den og nedlastingen starter på nytt.
+    """
+    import requests
+
+    http = session or requests
+    part = dest + ".part"
+    meta = part + ".meta"
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+
+    for attempt in range(retries + 1):
+        pos = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = _read_validator(meta) if pos else None
+        if pos and not validator:
+            log.info("Ingen ETag/Last-Modified for %s; starter nedlastingen på nytt", part)
+            _discard(part, meta)
+            pos = 0
+        headers = {"Range": f"bytes={pos}-", "If-Range": validator} if pos else {}
+        try:
+            with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # .part passer ikke filen på serveren lenger
+                    _discard(part, meta)
+                    raise DownloadError(f"Serveren avviste Range fra byte {pos}; starter på nytt")
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # Hele filen (Range ignorert eller If-Range traff ikke): start på nytt
+                    pos = 0
+                    validator = _validator(response)
+                    if validator:
+                        with open(meta, "w", encoding="utf-8") as f:
+                            f.write(validator)
+                    else:
+                        _discard(meta)
+                total = _total_size(response, pos)
+                with open(part, "ab" if pos else "wb") as f:
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                        pos += len(chunk)
+                        if progress_func:
+                            progress_func(pos, total)
+            if total is None or pos >= total:
+                break
+            raise DownloadError(f"Forbindelsen ble brutt etter {pos} av {total} bytes")
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, DownloadError) as e:
+            if attempt == retries:
+                raise DownloadError(f"Nedlasting feilet etter {retries + 1} forsøk: {e}") from e
+            log.warning("Nedlasting avbrutt (%s), prøver igjen fra byte %d", e, pos)
+            time.sleep(min(2 ** attempt, 30) * 0.5)
+
+    if expected_sha256:
+        actual = sha256_of(part)
+        if actual.lower() != expected_sha256.lower():
+            _discard(part, meta)
+            raise DownloadError(f"SHA-256 stemmer ikke: forventet {expected_sha256}, fikk {actual}")
+    os.replace(part, dest)
+    _discard(meta)
+    return dest
@@ -0,0 +1,135 @@
+# utils/jobs.py
+# Jobbkø for eksport og strekkoder: et fast antall arbeidstråder henter
+# jobber fra en prioritetskø, så mange klikk gir kø i stedet for mange
+# samtidige openpyxl-skrivinger. Avbrytelse er kooperativ: jobben sjekker
+# job.check_cancelled() (og job.progress() gjør det automatisk).
+# Modulen bruker ikke Tk; handlerne går via UIEventQueue til Tk-tråden.
+import itertools
+import queue
+import threading
+
+PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW = 0, 1, 2
+DEFAULT_WORKERS = 2
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "I kø", "Kjører", "Ferdig", "Feilet", "Avbrutt"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, manager, job_id, title, priority, fn, args, chan, show_panel=True):
+        self.id = job_id
+        self.title = title
+        self.priority = priority
+        self.show_panel = show_panel
+        self.status = QUEUED
+        self.percent = None
+        self.error = None
+        self._manager = manager
+        self._fn = fn
+        self._args = args
+        self._chan = chan
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.title)
+
+    def progress(self, *args):
+        # progress(pct) eller progress(ferdige, totalt); kalles fra jobbtråden
+        self.check_cancelled()
+        if len(args) == 1:
+            self.percent = args[0]
+        elif len(args) >= 2 and args[1]:
+            self.percent = args[0] * 100 // args[1]
+        self._chan.progress(*args)
+        self._manager._changed()
+
+    def log(self, message):
+        self._chan.log(message)
+
+    def data(self, payload):
+        self.check_cancelled()
+        self._chan.data(payload)
+
+
+class JobManager:
+    def __init__(self, events, max_workers=DEFAULT_WORKERS, on_change=None):
+        self.events = events
+        self.max_workers = max_workers
+        self.jobs = []
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._workers = []
+        self._lock = threading.Lock()
+        # on_change() kalles i Tk-tråden. Endringer meldes som progress på én
+        # kanal, så et panel tegnes maks én gang per frame.
+        self.on_change = on_change
+        self._notify = events.channel(on_progress=lambda: self.on_change and self.on_change())
+
+    def submit(self, title, fn, *args, priority=PRIORITY_NORMAL, show_panel=True,
+               on_progress=None, on_result=None, on_error=None, on_data=None):
+        # fn(job, *args) kjøres i en arbeidstråd; returverdien gis til on_result.
+        # show_panel=False: jobben har egen fremdriftsvisning og åpner ikke panelet.
+        chan = self.events.channel(on_progress, None, on_result, on_error, on_data)
+        job = Job(self, next(self._ids), title, priority, fn, args, chan, show_panel)
+        with self._lock:
+            self.jobs.append(job)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._run, name=f"job-{len(self._workers) + 1}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        self._queue.put((priority, next(self._seq), job))
+        self._changed()
+        return job
+
+    def cancel(self, job):
+        with self._lock:
+            if job.status in FINISHED:
+                return
+            job._cancel.set()
+            if job.status == QUEUED:
+                # Arbeidstråden hopper over den når den kommer til den i køen
+                job.status = CANCELLED
+                job._chan.close()
+        self._changed()
+
+    def active(self):
+        return [job for job in self.jobs if job.status not in FINISHED]
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = self.active()
+        self._changed()
+
+    def _changed(self):
+        self._notify.progress()
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                if job.cancelled:
+                    continue
+                job.status = RUNNING
+            self._changed()
+            try:
+                value = job._fn(job, *job._args)
+            except JobCancelled:
+                job.status = CANCELLED
+                job._chan.close()
+            except Exception as e:
+                job.status, job.error = FAILED, e
+                job._chan.error(e)
+            else:
+                job.status, job.percent = DONE, 100
+                job._chan.result(value)
+            self._changed()
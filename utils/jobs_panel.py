@@ -0,0 +1,71 @@
+# utils/jobs_panel.py
+# Ett ikke-modalt vindu som viser alle jobber i JobManager, i stedet for en
+# grab_set-popup per eksport. Vinduet skjules når det lukkes og vises igjen
+# ved neste jobb (eller fra menyen).
+import tkinter as tk
+from tkinter import ttk
+
+from utils.jobs import FINISHED
+
+
+class JobsPanel:
+    def __init__(self, root, manager, bg='#bfdfff'):
+        self.root = root
+        self.manager = manager
+        self.bg = bg
+        self.win = None
+        self.tree = None
+        self._seen = set()
+
+    def show(self):
+        if self.win is None:
+            self._build()
+        self.win.deiconify()
+        self.win.lift()
+        self.refresh()
+
+    def _build(self):
+        self.win = tk.Toplevel(self.root)
+        self.win.title("Jobber")
+        self.win.configure(bg=self.bg)
+        self.win.protocol("WM_DELETE_WINDOW", self.win.withdraw)
+
+        self.tree = ttk.Treeview(self.win, columns=("Jobb", "Status", "Fremdrift"), show='headings', height=6)
+        for col, width in (("Jobb", 280), ("Status", 90), ("Fremdrift", 80)):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        btn_row = tk.Frame(self.win, bg=self.bg)
+        btn_row.pack(pady=(0, 10))
+        ttk.Button(btn_row, text="Avbryt valgt", command=self.cancel_selected).pack(side='left', padx=5)
+        ttk.Button(btn_row, text="Fjern ferdige", command=self.manager.clear_finished).pack(side='left', padx=5)
+
+    def on_change(self):
+        # JobManager on_change: kalles i Tk-tråden, maks én gang per frame.
+        # Panelet vises av seg selv når en ny jobb (med show_panel) legges i køen.
+        new = [job for job in self.manager.jobs if job.id not in self._seen]
+        self._seen.update(job.id for job in new)
+        if any(job.show_panel for job in new):
+            self.show()
+        else:
+            self.refresh()
+
+    def refresh(self):
+        if self.win is None or not self.win.winfo_exists():
+            return
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for job in self.manager.jobs:
+            percent = "" if job.percent is None else f"{job.percent}%"
+            iid = str(job.id)
+            self.tree.insert('', 'end', iid=iid, values=(job.title, job.status, percent))
+            if iid in selected:
+                self.tree.selection_add(iid)
+
+    def cancel_selected(self):
+        by_id = {str(job.id): job for job in self.manager.jobs}
+        for iid in self.tree.selection():
+            job = by_id.get(iid)
+            if job and job.status not in FINISHED:
+                self.manager.cancel(job)
@@ -0,0 +1,43 @@
+# utils/lazy_imports.py
+# Tunge moduler (pandas, lxml, pygame ...) lastes først når de brukes,
+# eller varmes opp i en bakgrunnstråd etter at hovedvinduet er tegnet.
+import importlib
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """Stedfortreder for en modul som importeres ved første attributtoppslag."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "lastet" if self._module is not None else "ikke lastet"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def prewarm(*names):
+    # Importerer modulene i en daemon-tråd; importlåsen gjør det trygt om
+    # GUI-tråden ber om samme modul samtidig
+    def _worker():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                log.warning("Kunne ikke forhåndslaste %s: %s", name, e)
+
+    thread = threading.Thread(target=_worker, name="prewarm", daemon=True)
+    thread.start()
+    return thread
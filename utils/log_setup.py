@@ -0,0 +1,54 @@
+# utils/log_setup.py
+# Felles oppsett av logging. Nivåene settes fra config.json:
+#   "log_level": "INFO",                             standard for alle
+#   "log_levels": {"fiks.extract": "DEBUG", ...}     per logger/modul
+# Alt skrives til en roterende fil i cache-mappen, og til stderr når den
+# finnes (i en vindusbygget .exe er sys.stderr None).
+# Meldinger formateres først når de faktisk skrives, så bruk
+# log.debug("Produkt %d: %s", idx, row) og ikke f-strenger i løkker.
+import logging
+import logging.handlers
+import os
+import sys
+
+from utils.paths import user_cache_dir
+
+DEFAULT_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+
+def default_log_path() -> str:
+    return user_cache_dir("logs", "fiks_tools.log")
+
+
+def setup_logging(level=None, levels=None, log_path=None, console=True):
+    root = logging.getLogger()
+    root.setLevel((level or DEFAULT_LEVEL).upper())
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    log_path = log_path or default_log_path()
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        # delay=True: filen åpnes først ved første melding
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUPS, encoding="utf-8", delay=True,
+        )
+        file_handler.setFormatter(formatter)
+        root.addHandler(file_handler)
+    except OSError as e:
+        print(f"[WARN] Kunne ikke åpne loggfil: {e}", file=sys.stderr)
+
+    if console and sys.stderr is not None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        root.addHandler(stream_handler)
+
+    for name, name_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(str(name_level).upper())
+    return root
@@ -0,0 +1,18 @@
+# utils/paths.py
+# Per-bruker mapper for cache og tilstand (utenfor installasjonsmappen,
+# som ikke alltid er skrivbar for vanlige brukere).
+import os
+import platform
+
+APP_DIR_NAME = "FIKS Tools"
+
+
+def user_cache_dir(*parts) -> str:
+    system = platform.system()
+    if system == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif system == "Darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, APP_DIR_NAME, *parts)
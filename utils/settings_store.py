@@ -0,0 +1,90 @@
+# utils/settings_store.py
+# Innstillinger holdes i minnet; endringer samles opp og skrives til disk
+# av en timer-tråd etter delay sekunder uten nye endringer (debounce).
+# Skrivingen går via en midlertidig fil + os.replace, så et krasj midt i
+# en skriving aldri etterlater en avkuttet config.json. Ventende endringer
+# skrives ved avslutning (flush() / atexit).
+import atexit
+import json
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DELAY = 0.5
+
+
+class SettingsStore:
+    def __init__(self, path, defaults=None, delay=DEFAULT_DELAY):
+        self.path = path
+        self.delay = delay
+        self._lock = threading.Lock()        # minnet; holdes bare kort
+        self._write_lock = threading.Lock()  # én skriving til disk om gangen
+        self._timer = None
+        self._dirty = False
+        self._data = dict(defaults or {})
+        self._data.update(self._read())
+        atexit.register(self.flush)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("Kunne ikke lese %s, bruker standardverdier: %s", self.path, e)
+            return {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._data[key]
+
+    def update(self, **values):
+        # Endrer minnet umiddelbart; disken oppdateres etter delay sekunder
+        with self._lock:
+            changed = {k: v for k, v in values.items() if self._data.get(k, object()) != v}
+            if not changed:
+                return
+            self._data.update(changed)
+            self._dirty = True
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        # Skriver ventende endringer nå (kalles av timeren og ved avslutning).
+        # Selve skrivingen skjer utenfor _lock, så update() fra GUI-tråden
+        # aldri venter på disken.
+        with self._write_lock:
+            with self._lock:
+                if self._timer:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                data = dict(self._data)
+                self._dirty = False
+            try:
+                self._write(data)
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                log.error("Kunne ikke lagre %s: %s", self.path, e)
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
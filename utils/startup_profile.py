@@ -0,0 +1,49 @@
+# utils/startup_profile.py
+# --profile-startup: starter appen på nytt med "python -X importtime",
+# lar den tegne hovedvinduet og avslutte, og skriver ut hvor tiden gikk.
+import re
+import subprocess
+import sys
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+STARTUP_LINE = re.compile(r"\[STARTUP\] vindu tegnet etter (\d+) ms")
+
+
+def parse_importtime(stderr: str):
+    # -> [(kumulativ_us, egen_us, nivå, modul)] for hver importlinje
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            rows.append((int(cumulative_us), int(self_us), (len(indent) - 1) // 2, name))
+    return rows
+
+
+def profile_startup(script, budget_ms, top=20):
+    if getattr(sys, "frozen", False):
+        print("--profile-startup krever at appen kjøres med Python, ikke som .exe")
+        return 2
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", script, "--startup-probe"],
+        capture_output=True, text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    window = STARTUP_LINE.search(proc.stdout)
+
+    top_level = sorted((r for r in rows if r[2] == 0), reverse=True)
+    total_import_ms = sum(r[0] for r in top_level) / 1000
+    print(f"{'kumulativt (ms)':>16} {'egen (ms)':>10}  modul")
+    for cumulative_us, self_us, _, name in top_level[:top]:
+        print(f"{cumulative_us / 1000:16.1f} {self_us / 1000:10.1f}  {name}")
+    print(f"\nImporter totalt: {total_import_ms:.0f} ms ({len(rows)} moduler)")
+
+    if not window:
+        print("Fant ikke målepunkt for hovedvinduet; startet appen?")
+        print(proc.stderr[-2000:])
+        return 2
+    window_ms = int(window.group(1))
+    status = "OK" if window_ms <= budget_ms else "OVER BUDSJETT"
+    print(f"Hovedvindu tegnet etter {window_ms} ms (budsjett {budget_ms} ms): {status}")
+    return 0 if window_ms <= budget_ms else 1
@@ -0,0 +1,126 @@
+# utils/tracing.py
+# Tidsmåling per steg: with span("detect_extractor"): ...
+# Av som standard; da returnerer span() ett felles tomt kontekstobjekt og
+# koster bare et funksjonskall. Slås på med miljøvariabelen FIKS_TRACE
+# (eller fra menyen i GUI-et):
+#   FIKS_TRACE=summary         tabell per steg skrives ut ved avslutning
+#   FIKS_TRACE=chrome          Chrome trace-event JSON i cache-mappen
+#   FIKS_TRACE=/sti/trace.json Chrome trace-event JSON til gitt fil
+# Trace-filene åpnes i chrome://tracing eller https://ui.perfetto.dev.
+import atexit
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.paths import user_cache_dir
+
+log = logging.getLogger(__name__)
+
+TRACE_ENV = "FIKS_TRACE"
+
+_NULL = contextlib.nullcontext()
+_recorder = None
+
+
+class Recorder:
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.events = []  # (navn, tråd, start_ns, varighet_ns, args)
+
+    def add(self, name, start, duration, args):
+        # list.append er atomisk, så flere tråder kan registrere samtidig
+        self.events.append((name, threading.get_ident(), start - self.origin, duration, args))
+
+    def summary(self) -> str:
+        stats = {}
+        for name, _, _, duration, _ in self.events:
+            count, total, longest = stats.get(name, (0, 0, 0))
+            stats[name] = (count + 1, total + duration, max(longest, duration))
+        lines = [f"{'steg':<28} {'antall':>7} {'totalt (ms)':>12} {'snitt (ms)':>11} {'maks (ms)':>10}"]
+        for name, (count, total, longest) in sorted(stats.items(), key=lambda kv: -kv[1][1]):
+            lines.append(f"{name:<28} {count:>7} {total / 1e6:>12.1f} {total / count / 1e6:>11.2f} {longest / 1e6:>10.1f}")
+        return "\n".join(lines)
+
+    def write_chrome(self, path):
+        pid = os.getpid()
+        events = [
+            {"name": name, "ph": "X", "pid": pid, "tid": tid,
+             "ts": start / 1000, "dur": duration / 1000, "args": args}
+            for name, tid, start, duration, args in self.events
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start")
+
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+def span(name, **args):
+    recorder = _recorder
+    if recorder is None:
+        return _NULL
+    return _Span(recorder, name, args)
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def enable():
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder()
+    return _recorder
+
+
+def disable():
+    # Slår av og returnerer det som ble målt (eller None)
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def default_trace_path() -> str:
+    return user_cache_dir("traces", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+
+def report(recorder, mode):
+    # mode som i FIKS_TRACE; returnerer stien til trace-filen, hvis noen
+    if not recorder or not recorder.events:
+        return None
+    if mode == "summary":
+        print(recorder.summary())
+        return None
+    path = default_trace_path() if mode == "chrome" else mode
+    recorder.write_chrome(path)
+    log.info("Trace skrevet til %s", path)
+    return path
+
+
+def enable_from_env():
+    # Kalles ved oppstart; resultatet rapporteres når prosessen avslutter
+    mode = os.environ.get(TRACE_ENV, "").strip()
+    if not mode or mode == "0":
+        return False
+    enable()
+    atexit.register(lambda: report(disable(), mode))
+    return True
@@ -0,0 +1,114 @@
+# utils/ui_events.py
+# Felles hendelseskø mellom arbeidstråder og Tk. Tk er ikke trådsikker, så
+# trådene rører aldri widgets selv: de legger progress/log/result/error-
+# hendelser i køen, og Tk-tråden tømmer den med after() én gang per frame.
+# Flere progress-hendelser fra samme kanal innen én frame slås sammen til
+# den siste, så et stort eksportjobb gir maks én UI-oppdatering per frame.
+import itertools
+import logging
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+FRAME_MS = 16
+
+PROGRESS, LOG, DATA, RESULT, ERROR, CLOSE = "progress", "log", "data", "result", "error", "close"
+
+
+class Channel:
+    """Avsenderen for én operasjon; metodene kan kalles fra hvilken som helst tråd."""
+
+    def __init__(self, events, channel_id):
+        self._events = events
+        self.id = channel_id
+
+    def progress(self, *args):
+        self._events._put(self.id, PROGRESS, args)
+
+    def log(self, message):
+        self._events._put(self.id, LOG, (message,))
+
+    def data(self, payload):
+        # Delresultater (f.eks. en bolk rader); slås aldri sammen
+        self._events._put(self.id, DATA, (payload,))
+
+    def result(self, value=None):
+        self._events._put(self.id, RESULT, (value,))
+
+    def error(self, exc):
+        self._events._put(self.id, ERROR, (exc,))
+
+    def close(self):
+        # Lukker kanalen uten å kalle noen handler (f.eks. ved avbrutt jobb)
+        self._events._put(self.id, CLOSE, ())
+
+
+class UIEventQueue:
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self._queue = queue.Queue()
+        self._handlers = {}
+        self._ids = itertools.count(1)
+        self.root.after(self.frame_ms, self._drain)
+
+    def channel(self, on_progress=None, on_log=None, on_result=None, on_error=None, on_data=None):
+        # Handlerne kalles alltid i Tk-tråden. Kanalen lukkes etter result/error/close.
+        channel_id = next(self._ids)
+        self._handlers[channel_id] = {
+            PROGRESS: on_progress,
+            LOG: on_log or (lambda message: log.info("%s", message)),
+            DATA: on_data,
+            RESULT: on_result,
+            ERROR: on_error or (lambda e: log.error("%s", e)),
+        }
+        return Channel(self, channel_id)
+
+    def run(self, fn, *args, on_progress=None, on_log=None, on_result=None, on_error=None,
+            name=None):
+        # fn(channel, *args) kjøres i en bakgrunnstråd; returverdien blir result-hendelsen
+        chan = self.channel(on_progress, on_log, on_result, on_error)
+
+        def worker():
+            try:
+                chan.result(fn(chan, *args))
+            except Exception as e:
+                chan.error(e)
+        threading.Thread(target=worker, name=name, daemon=True).start()
+        return chan
+
+    def _put(self, channel_id, kind, args):
+        self._queue.put((channel_id, kind, args))
+
+    def _drain(self):
+        latest_progress = {}
+        pending = []
+        try:
+            while True:
+                channel_id, kind, args = self._queue.get_nowait()
+                if kind == PROGRESS:
+                    latest_progress[channel_id] = args
+                else:
+                    pending.append((channel_id, kind, args))
+        except queue.Empty:
+            pass
+
+        # Fremdrift først, så logg/resultat i rekkefølgen de kom
+        for channel_id, args in latest_progress.items():
+            self._dispatch(channel_id, PROGRESS, args)
+        for channel_id, kind, args in pending:
+            self._dispatch(channel_id, kind, args)
+            if kind in (RESULT, ERROR, CLOSE):
+                self._handlers.pop(channel_id, None)
+        self.root.after(self.frame_ms, self._drain)
+
+    def _dispatch(self, channel_id, kind, args):
+        handler = self._handlers.get(channel_id, {}).get(kind)
+        if handler is None:
+            return
+        try:
+            handler(*args)
+        except Exception as e:
+            # En feil i én handler skal ikke stoppe køen for resten av appen
+            log.exception("Hendelse %s feilet: %s", kind, e)
@@ -0,0 +1,110 @@
+# utils/update_check.py
+# Sjekk av siste release på GitHub, med svaret og ETag-en lagret på disk.
+# Innenfor interval_hours brukes det lagrede svaret uten nettverk; etterpå
+# spørres det med If-None-Match, så et uendret svar bare koster en 304.
+# api_url og state_path kan pekes mot en lokal testserver / midlertidig fil.
+import json
+import os
+import time
+
+from utils.paths import user_cache_dir
+
+GITHUB_API = "https://api.github.com"
+DEFAULT_INTERVAL_HOURS = 12
+
+
+def default_state_path() -> str:
+    return user_cache_dir("update_check.json")
+
+
+def _load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def fetch_latest_release(repo, api_url=GITHUB_API, state_path=None,
+                         interval_hours=DEFAULT_INTERVAL_HOURS, timeout=5):
+    """Returnerer {"tag_name", "assets": [{"name", "browser_download_url"}]}.
+
+    Kaster requests-feil videre; kalleren bestemmer hvordan de vises.
+    """
+    import requests
+
+    state_path = state_path or default_state_path()
+    state = _load_state(state_path)
+    release = state.get("release")
+    if release and time.time() - state.get("checked_at", 0) < interval_hours * 3600:
+        return release
+
+    headers = {"Accept": "application/vnd.github+json"}
+    if release and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    response = requests.get(f"{api_url}/repos/{repo}/releases/latest", headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and release:
+        etag = state.get("etag")
+    else:
+        response.raise_for_status()
+        data = response.json()
+        release = {
+            "tag_name": data["tag_name"],
+            "assets": [
+                {"name": a["name"], "browser_download_url": a["browser_download_url"],
+                 "digest": a.get("digest")}
+                for a in data.get("assets", [])
+            ],
+        }
+        etag = response.headers.get("ETag")
+
+    _save_state(state_path, {"checked_at": time.time(), "etag": etag, "release": release})
+    return release
+
+
+def version_tuple(version: str):
+    # "v1.10" -> (1, 10); tekst-sammenligning ville gitt "1.10" < "1.9"
+    parts = []
+    for part in version.lstrip("v").split("."):
+        digits = "".join(c for c in part if c.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+
+def newer_installer(release, current_version):
+    # -> (versjon, asset) hvis releasen er nyere og har en .exe, ellers None.
+    # En eventuell "<navn>.sha256"-asset legges ved som asset["sha256_url"].
+    if not release:
+        return None
+    latest = release["tag_name"].lstrip("v")
+    if version_tuple(latest) <= version_tuple(current_version):
+        return None
+    by_name = {a["name"]: a for a in release["assets"]}
+    for asset in release["assets"]:
+        if asset["name"].endswith(".exe"):
+            sidecar = by_name.get(asset["name"] + ".sha256")
+            return latest, {**asset, "sha256_url": sidecar["browser_download_url"] if sidecar else None}
+    return None
+
+
+def published_sha256(asset, timeout=10):
+    # GitHub oppgir "digest": "sha256:<hex>" per asset; ellers brukes en
+    # medfølgende .sha256-fil ("<hex>  <filnavn>"). None hvis ingen finnes.
+    digest = asset.get("digest") or ""
+    if digest.startswith("sha256:"):
+        return digest.split(":", 1)[1]
+    if asset.get("sha256_url"):
+        import requests
+        response = requests.get(asset["sha256_url"], timeout=timeout)
+        response.raise_for_status()
+        return response.text.split()[0]
+    return None
@@ -0,0 +1,150 @@
+# utils/virtual_tree.py
+# Tabell over en liste med rader der bare radene som synes, finnes som
+# Treeview-elementer. Rulling flytter vinduet og skriver nye verdier inn i
+# de samme elementene, så tiden det tar å vise tabellen ikke avhenger av
+# hvor mange rader dokumentet har. format_row kjøres bare for synlige rader.
+# Markering og fokus lagres som indekser i rows, ikke som Treeview-elementer,
+# så de følger dataradene når vinduet flyttes.
+import math
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTable(ttk.Frame):
+    def __init__(self, parent, columns, rows=None, format_row=None, widths=None, height=20):
+        super().__init__(parent)
+        self.rows = rows if rows is not None else []
+        self.format_row = format_row or (lambda row: [row.get(col, "") for col in self.columns])
+        self.widths = widths or {}
+        self.columns = []
+        self.offset = 0
+        self.visible = height
+        self.selected = set()    # indekser i rows
+        self.focus_index = None
+
+        self.tree = ttk.Treeview(self, show='headings', height=height)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        style = ttk.Style(self)
+        self.row_height = int(float(style.lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT))
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        for key, step in (('<Up>', -1), ('<Down>', 1)):
+            self.tree.bind(key, lambda e, step=step: self.move_focus(step))
+        for key, step in (('<Prior>', -1), ('<Next>', 1)):
+            self.tree.bind(key, lambda e, step=step: self.move_focus(step * self.visible))
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0) or 'break')
+        self.tree.bind('<End>', lambda e: self.scroll_to(len(self.rows)) or 'break')
+
+        self.set_columns(columns)
+
+    def set_columns(self, columns):
+        self.columns = list(columns)
+        self.tree["columns"] = self.columns
+        for col in self.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=self.widths.get(col, 120), anchor="w")
+        self.refresh()
+
+    def rows_added(self):
+        # Kalles etter at self.rows er utvidet (f.eks. under strømmende ekstrahering)
+        if len(self.tree.get_children()) < self.visible:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def scroll(self, delta):
+        self.scroll_to(self.offset + delta)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.rows) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def move_focus(self, delta):
+        # Flytter fokus (og markeringen) delta rader og ruller så raden synes
+        if not self.rows:
+            return 'break'
+        start = self.offset if self.focus_index is None else self.focus_index
+        index = max(0, min(start + delta, len(self.rows) - 1))
+        self.focus_index = index
+        self.selected = {index}
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible:
+            self.offset = index - self.visible + 1
+        self.refresh()
+        return 'break'
+
+    def refresh(self):
+        # Gjenbruker elementene som finnes, og legger til/fjerner bare differansen
+        window = self.rows[self.offset:self.offset + self.visible]
+        items = self.tree.get_children()
+        for i, row in enumerate(window):
+            values = self.format_row(row)
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert('', 'end', values=values)
+        if len(items) > len(window):
+            self.tree.delete(*items[len(window):])
+        self._apply_selection()
+        self._update_scrollbar()
+
+    def _apply_selection(self):
+        items = self.tree.get_children()
+        self.tree.selection_set([items[i - self.offset] for i in sorted(self.selected)
+                                 if 0 <= i - self.offset < len(items)])
+        focus = self.focus_index
+        if focus is not None and 0 <= focus - self.offset < len(items):
+            self.tree.focus(items[focus - self.offset])
+        else:
+            self.tree.focus('')
+
+    def _on_select(self, event):
+        # Markeringen utenfor vinduet beholdes; den synlige delen leses fra treet
+        items = self.tree.get_children()
+        in_window = range(self.offset, self.offset + len(items))
+        self.selected = {i for i in self.selected if i not in in_window}
+        self.selected.update(self.offset + items.index(item) for item in self.tree.selection())
+        focus = self.tree.focus()
+        if focus in items:
+            self.focus_index = self.offset + items.index(focus)
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(float(amount) * len(self.rows))
+        elif unit == 'pages':
+            self.scroll(int(amount) * self.visible)
+        else:
+            self.scroll(int(amount))
+
+    def _on_wheel(self, event):
+        # Windows gir delta i steg på 120, macOS i små heltall
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-steps * 3)
+        return 'break'
+
+    def _on_resize(self, event):
+        # Overskriftsraden tar omtrent én radhøyde. height-opsjonen endres ikke
+        # her; det ville endret ønsket størrelse og gitt en ny <Configure>.
+        visible = max(1, math.ceil(event.height / self.row_height) - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.offset = max(0, min(self.offset, len(self.rows) - visible))
+            self.refresh()
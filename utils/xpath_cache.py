@@ -0,0 +1,45 @@
+# utils/xpath_cache.py
+# Felles register med forhåndskompilerte XPath-uttrykk for extractorene.
+# ctx.xpath("...") kompilerer uttrykket på nytt ved hvert kall; her
+# kompileres hvert uttrykk én gang per prosess og gjenbrukes.
+# lxml importeres først når det første uttrykket kompileres.
+_XPATH_CACHE = {}
+
+
+def compiled(expr: str):
+    xp = _XPATH_CACHE.get(expr)
+    if xp is None:
+        from lxml import etree
+        xp = _XPATH_CACHE[expr] = etree.XPath(expr)
+    return xp
+
+
+def local_path(*names) -> str:
+    # local_path("DeliveredQuantity", "Quantity")
+    #   -> ".//*[local-name()='DeliveredQuantity']/*[local-name()='Quantity']"
+    return ".//" + "/".join(f"*[local-name()='{n}']" for n in names)
+
+
+def find_all(ctx, *names) -> list:
+    # Navnerom-uavhengig søk etter etterkommere med gitt lokal sti
+    xp = _XPATH_CACHE.get(names)
+    if xp is None:
+        xp = _XPATH_CACHE[names] = compiled(local_path(*names))
+    return xp(ctx)
+
+
+def find_text(ctx, *names) -> str:
+    res = find_all(ctx, *names)
+    return res[0].text.strip() if res and res[0].text else ""
+
+
+# AdditionalProductId med gitt <Code> -> tilhørende <Text>
+_CODE_TEXT = (
+    ".//*[local-name()='AdditionalProductId'][*[local-name()='Code']=$code]"
+    "/*[local-name()='Text']"
+)
+
+
+def find_code_text(ctx, code: str) -> str:
+    res = compiled(_CODE_TEXT)(ctx, code=code)
+    return res[0].text.strip() if res and res[0].text else ""